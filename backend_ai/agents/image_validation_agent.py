@@ -5,15 +5,20 @@ from ..tools.ela_detector import ELADetector
 from ..tools.exif_analysis import ExifAnalyzer
 from ..tools.web_comparative_search import WebComparativeSearcher
 from ..tools.duplicate_check import DuplicateCheckerQdrant
+import os
+import threading
 from google import genai
 from dotenv import load_dotenv
 
 load_dotenv()
 
+_AGENT = None
+_AGENT_LOCK = threading.Lock()
+
 class GeminiAutonomousAgent:
     def __init__(self, gemini_api_key, serpapi_key, imgbb_api_key, serper_api_key=None, qdrant_url="http://localhost:6333", qdrant_api_key=None, openrouter_api_key=None):
         self.gemini_client = genai.Client(api_key=gemini_api_key)
-        self.reverse_searcher = ReverseImageSearcher(serpapi_key=serpapi_key)
+        self.reverse_searcher = ReverseImageSearcher(serpapi_key=serpapi_key, imgbb_api_key=imgbb_api_key)
         self.ai_detector = AIImageDetector(model_type="umm-maybe")
         self.sdxl_detector = AIImageDetector(model_type="sdxl")
         self.vision_analyzer = VisionAnalyzer(openrouter_api_key=openrouter_api_key)
@@ -216,19 +221,32 @@ Provide your analysis in a structured format.
         }
 
 
+def get_agent():
+    """
+    Process-wide agent built from the environment on first use. Construction loads two
+    detector models and opens the API clients, so callers should reuse this instance
+    rather than build one per request.
+    """
+    global _AGENT
+    if _AGENT is None:
+        with _AGENT_LOCK:
+            if _AGENT is None:
+                _AGENT = GeminiAutonomousAgent(
+                    gemini_api_key=os.getenv("GEMINI_API_KEY"),
+                    serpapi_key=os.getenv("SERPAPI_KEY"),
+                    imgbb_api_key=os.getenv("IMGBB_API_KEY"),
+                    serper_api_key=os.getenv("SERPER_API_KEY"),
+                    qdrant_url=os.getenv("QDRANT_URL", "http://localhost:6333"),
+                    qdrant_api_key=os.getenv("QDRANT_API_KEY"),
+                    openrouter_api_key=os.getenv("OPENROUTER_API_KEY"),
+                )
+    return _AGENT
+
+
 # --- Main block for testing ---
 if __name__ == "__main__":
-    import os
     import sys
     # Example usage: python image_validation_agent.py <image_path> <category> <description>
-    gemini_api_key = os.getenv("GEMINI_API_KEY")
-    serpapi_key = os.getenv("SERPAPI_KEY")
-    imgbb_api_key = os.getenv("IMGBB_API_KEY")
-    serper_api_key = os.getenv("SERPER_API_KEY")
-    qdrant_url = os.getenv("QDRANT_URL", "http://localhost:6333")
-    qdrant_api_key = os.getenv("QDRANT_API_KEY")
-    openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
-
     if len(sys.argv) < 2:
         print("Usage: python image_validation_agent.py <image_path> [category] [description]")
         sys.exit(1)
@@ -237,15 +255,7 @@ if __name__ == "__main__":
     category = sys.argv[2] if len(sys.argv) > 2 else None
     description = sys.argv[3] if len(sys.argv) > 3 else None
 
-    agent = GeminiAutonomousAgent(
-        gemini_api_key=gemini_api_key,
-        serpapi_key=serpapi_key,
-        imgbb_api_key=imgbb_api_key,
-        serper_api_key=serper_api_key,
-        qdrant_url=qdrant_url,
-        qdrant_api_key=qdrant_api_key,
-        openrouter_api_key=openrouter_api_key
-    )
+    agent = get_agent()
 
     result = agent.run(image_path, category=category, description=description)
     print("\n" + "="*60)
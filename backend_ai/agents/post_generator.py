@@ -8,6 +8,7 @@ while Gemini excels at creative copywriting.
 """
 
 import base64
+import io
 import logging
 import os
 import re
@@ -122,7 +123,6 @@ class AuctionPostGenerator:
         with Image.open(image_path) as img:
             img = img.convert("RGB")
             img.thumbnail(self.max_image_size, Image.LANCZOS)
-            import io
             buffer = io.BytesIO()
             img.save(buffer, format="JPEG", quality=90)
             b64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
@@ -2,8 +2,9 @@
 
 from PIL import Image, UnidentifiedImageError
 import numpy as np
-import os
+import io
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Optional
 import tempfile
@@ -62,6 +63,10 @@ class ELADetector:
         self.suspicious_score = suspicious_score
         self.manipulated_score = manipulated_score
 
+        # Verdict lookup: searchsorted over the cutoffs indexes straight into _verdicts
+        self._verdict_thresholds = np.array([self.suspicious_score, self.manipulated_score])
+        self._verdicts = ("clean", "suspicious", "likely_manipulated")
+
     def _load_and_normalize(self, image_path: str) -> Image.Image:
         """Load image, normalize to RGB JPEG-compatible format."""
         try:
@@ -73,18 +78,11 @@ class ELADetector:
             raise ValueError(f"Cannot read image: {image_path}")
 
     def _resave_as_jpeg(self, img: Image.Image, quality: int) -> Image.Image:
-        """Re-save image at given JPEG quality and reload it."""
-        with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as tmp:
-            tmp_path = tmp.name
-
-        try:
-            img.save(tmp_path, format="JPEG", quality=quality)
-            reloaded = Image.open(tmp_path).convert("RGB")
-            reloaded.load()  # force read before file is deleted
-        finally:
-            os.unlink(tmp_path)
-
-        return reloaded
+        """Re-save image at given JPEG quality and reload it (in memory, no temp file)."""
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=quality)
+        buf.seek(0)
+        return Image.open(buf).convert("RGB")
 
     def _compute_ela_array(
         self, original: Image.Image, recompressed: Image.Image
@@ -106,20 +104,35 @@ class ELADetector:
         amplified = np.clip(ela_arr * self.amplify_factor, 0, 255).astype(np.uint8)
         return Image.fromarray(amplified)
 
-    def _compute_scores(self, ela_arr: np.ndarray) -> tuple[float, float, float]:
+    def _save_visualization(self, original: Image.Image, recompressed: Image.Image) -> str:
+        """Write the amplified ELA image to a temp PNG and return its path."""
+        ela_img = self._amplify_for_visualization(self._compute_ela_array(original, recompressed))
+        with tempfile.NamedTemporaryFile(suffix="_ela.png", delete=False) as tmp:
+            ela_img.save(tmp, format="PNG")
+            return tmp.name
+
+    def _compute_scores(
+        self, original: Image.Image, recompressed: Image.Image
+    ) -> tuple[float, float, float]:
         """
         Compute mean error, max error, and ratio of high-error pixels.
         Returns (mean_error, max_error, high_error_ratio).
+
+        Works on uint8 data end to end: no float32 (H, W, 3) difference array is
+        materialized, only a uint8 diff and a uint16 per-pixel channel sum.
         """
-        # Per-pixel magnitude (average across RGB channels)
-        pixel_errors = ela_arr.mean(axis=2)  # shape (H, W)
+        orig_arr = np.asarray(original, dtype=np.uint8)
+        recomp_arr = np.asarray(recompressed, dtype=np.uint8)
+        diff = np.maximum(orig_arr, recomp_arr) - np.minimum(orig_arr, recomp_arr)
 
-        mean_error = float(pixel_errors.mean())
-        max_error = float(pixel_errors.max())
+        # Per-pixel magnitude, kept as the channel sum (mean = sum / 3)
+        pixel_sums = diff.sum(axis=2, dtype=np.uint16)  # shape (H, W)
 
-        total_pixels = pixel_errors.size
-        high_error_pixels = np.sum(pixel_errors > self.anomaly_threshold)
-        high_error_ratio = float(high_error_pixels / total_pixels)
+        mean_error = float(pixel_sums.mean()) / 3.0
+        max_error = float(pixel_sums.max()) / 3.0
+
+        high_error_pixels = np.count_nonzero(pixel_sums > self.anomaly_threshold * 3.0)
+        high_error_ratio = float(high_error_pixels / pixel_sums.size)
 
         return mean_error, max_error, high_error_ratio
 
@@ -139,69 +152,100 @@ class ELADetector:
         - Very low mean_error with isolated high_error spikes = classic splice signature.
         """
         score = 0.0
-        notes_parts = []
 
         # 1. High error ratio contributes up to 0.5
-        ratio_score = min(high_error_ratio * 5.0, 0.5)
-        score += ratio_score
-        if high_error_ratio > 0.05:
-            notes_parts.append(
-                f"{high_error_ratio:.1%} of pixels show anomalous error (threshold: {self.anomaly_threshold})"
-            )
+        score += min(high_error_ratio * 5.0, 0.5)
 
         # 2. Contrast between mean and max: large gap = isolated tampering
         if mean_error > 0:
             contrast_ratio = max_error / (mean_error + 1e-6)
             contrast_score = min((contrast_ratio - 1.0) / 30.0, 0.3)
             score += max(contrast_score, 0.0)
-            if contrast_ratio > 10:
-                notes_parts.append(
-                    f"High contrast between mean ({mean_error:.2f}) and max ({max_error:.2f}) error — "
-                    f"suggests localized manipulation"
-                )
 
         # 3. Very low mean error with high ratio = clean background + spliced region
         if mean_error < 5.0 and high_error_ratio > 0.02:
             score += 0.2
+
+        score = min(score, 1.0)
+
+        return score, self._build_notes(mean_error, max_error, high_error_ratio)
+
+    def _build_suspicion_scores(
+        self,
+        mean_error: np.ndarray,
+        max_error: np.ndarray,
+        high_error_ratio: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Vectorized _build_suspicion_score over length-N metric arrays.
+        Same scoring rules, applied element-wise without a Python loop.
+        """
+        ratio_score = np.minimum(high_error_ratio * 5.0, 0.5)
+        contrast_ratio = max_error / (mean_error + 1e-6)
+        contrast_score = np.where(
+            mean_error > 0, np.clip((contrast_ratio - 1.0) / 30.0, 0.0, 0.3), 0.0
+        )
+        splice_bonus = np.where((mean_error < 5.0) & (high_error_ratio > 0.02), 0.2, 0.0)
+        return np.minimum(ratio_score + contrast_score + splice_bonus, 1.0)
+
+    def _build_notes(
+        self,
+        mean_error: float,
+        max_error: float,
+        high_error_ratio: float,
+    ) -> str:
+        """Human-readable explanation matching the suspicion score components."""
+        notes_parts = []
+
+        if high_error_ratio > 0.05:
             notes_parts.append(
-                "Low global error but localized hotspots — classic copy-paste or splice pattern"
+                f"{high_error_ratio:.1%} of pixels show anomalous error (threshold: {self.anomaly_threshold})"
             )
 
-        score = min(score, 1.0)
+        if mean_error > 0 and max_error / (mean_error + 1e-6) > 10:
+            notes_parts.append(
+                f"High contrast between mean ({mean_error:.2f}) and max ({max_error:.2f}) error — "
+                f"suggests localized manipulation"
+            )
+
+        if mean_error < 5.0 and high_error_ratio > 0.02:
+            notes_parts.append(
+                "Low global error but localized hotspots — classic copy-paste or splice pattern"
+            )
 
         if not notes_parts:
-            notes = "No strong manipulation indicators detected."
-        else:
-            notes = " | ".join(notes_parts)
+            return "No strong manipulation indicators detected."
+        return " | ".join(notes_parts)
 
-        return score, notes
+    def _compute_image_metrics(self, image_path: str) -> tuple[float, float, float]:
+        """Load, recompress and diff one image. Returns (mean_error, max_error, high_error_ratio)."""
+        original = self._load_and_normalize(image_path)
+        recompressed = self._resave_as_jpeg(original, quality=self.resave_quality)
+        return self._compute_scores(original, recompressed)
 
-    def analyze(self, image_path: str) -> ELAResult:
+    def analyze(self, image_path: str, save_visualization: bool = False) -> ELAResult:
         """
         Run ELA on the given image.
         Returns an ELAResult with scores, verdict, and optional visualization path.
+        The amplified ELA image is only built when save_visualization is True.
         """
         logger.info(f"Running ELA on: {image_path}")
 
         original = self._load_and_normalize(image_path)
         recompressed = self._resave_as_jpeg(original, quality=self.resave_quality)
-        ela_arr = self._compute_ela_array(original, recompressed)
-
-        mean_error, max_error, high_error_ratio = self._compute_scores(ela_arr)
+        mean_error, max_error, high_error_ratio = self._compute_scores(original, recompressed)
         suspicion_score, notes = self._build_suspicion_score(
             mean_error, max_error, high_error_ratio
         )
 
         # Determine verdict
-        if suspicion_score >= self.manipulated_score:
-            verdict = "likely_manipulated"
-        elif suspicion_score >= self.suspicious_score:
-            verdict = "suspicious"
-        else:
-            verdict = "clean"
+        verdict = self._verdicts[
+            int(np.searchsorted(self._verdict_thresholds, suspicion_score, side="right"))
+        ]
 
-        # Do not save ELA visualization
-        ela_image_path = None
+        ela_image_path = (
+            self._save_visualization(original, recompressed) if save_visualization else None
+        )
 
         result = ELAResult(
             suspicion_score=round(suspicion_score, 4),
@@ -220,6 +264,39 @@ class ELADetector:
         )
         return result
 
+    def analyze_batch(self, image_paths: list[str], max_workers: int = 4) -> list[ELAResult]:
+        """
+        Run ELA on several images.
+        Per-image decode/diff runs in a thread pool (PIL and NumPy release the GIL),
+        then scoring and verdicts are computed once over the whole batch.
+        """
+        if not image_paths:
+            return []
+
+        logger.info(f"Running batch ELA on {len(image_paths)} images")
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            metrics = np.array(
+                list(pool.map(self._compute_image_metrics, image_paths)), dtype=np.float64
+            )
+
+        mean_errors, max_errors, high_error_ratios = metrics.T
+        scores = self._build_suspicion_scores(mean_errors, max_errors, high_error_ratios)
+        verdict_idx = np.searchsorted(self._verdict_thresholds, scores, side="right")
+
+        return [
+            ELAResult(
+                suspicion_score=round(float(scores[i]), 4),
+                mean_error=round(float(mean_errors[i]), 4),
+                max_error=round(float(max_errors[i]), 4),
+                high_error_ratio=round(float(high_error_ratios[i]), 6),
+                verdict=self._verdicts[int(verdict_idx[i])],
+                ela_image_path=None,
+                notes=self._build_notes(mean_errors[i], max_errors[i], high_error_ratios[i]),
+            )
+            for i in range(len(image_paths))
+        ]
+
 
 
 # ----------------------------------------
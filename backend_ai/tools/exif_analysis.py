@@ -3,13 +3,27 @@
 from datetime import datetime, timezone
 import logging
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
 from PIL import Image
-from PIL.ExifTags import TAGS
+from PIL.ExifTags import TAGS, GPSTAGS, Base, IFD
 
 logger = logging.getLogger(__name__)
 
+# Tags the pipeline actually reads; MakerNote and other proprietary blobs are skipped.
+WANTED_IFD0_TAGS = frozenset({
+    Base.Make, Base.Model, Base.Software, Base.DateTime, Base.Orientation,
+    Base.Artist, Base.Copyright, Base.HostComputer, Base.ImageDescription,
+})
+WANTED_EXIF_IFD_TAGS = frozenset({
+    Base.DateTimeOriginal, Base.DateTimeDigitized, Base.OffsetTimeOriginal,
+    Base.LensModel, Base.BodySerialNumber,
+})
+
+
+def _decode_value(value: Any) -> Any:
+    return value.decode("utf-8", errors="replace") if isinstance(value, bytes) else value
+
 
 class ExifAnalyzer:
     """
@@ -21,39 +35,56 @@ class ExifAnalyzer:
 
     def extract_exif(self, image_path: str) -> Dict[str, Any]:
         """Extract EXIF metadata from an image into a JSON-serializable dict."""
+        return self._read_exif(image_path)[1]
+
+    def _read_exif(self, image_path: str) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Return (has_exif, wanted tags). has_exif reflects the raw EXIF block,
+        so an image carrying only non-whitelisted tags still counts as having EXIF.
+        """
         try:
             with Image.open(image_path) as image:
                 exif_data = image.getexif()
 
                 if not exif_data:
-                    return {}
-
-                extracted: Dict[str, Any] = {}
-                for tag_id, value in exif_data.items():
-                    tag_name = TAGS.get(tag_id, str(tag_id))
-                    if isinstance(value, bytes):
-                        extracted[str(tag_name)] = value.decode(
-                            "utf-8", errors="replace"
-                        )
-                    else:
-                        extracted[str(tag_name)] = value
-
-                return extracted
+                    return False, {}
+
+                wanted = {k: v for k, v in exif_data.items() if k in WANTED_IFD0_TAGS}
+                if IFD.Exif in exif_data:
+                    wanted.update(
+                        (k, v)
+                        for k, v in exif_data.get_ifd(IFD.Exif).items()
+                        if k in WANTED_EXIF_IFD_TAGS
+                    )
+
+                extracted = {
+                    TAGS.get(tag_id, str(tag_id)): _decode_value(value)
+                    for tag_id, value in wanted.items()
+                }
+                if IFD.GPSInfo in exif_data:
+                    gps = exif_data.get_ifd(IFD.GPSInfo)
+                    if gps:
+                        extracted["GPSInfo"] = {
+                            GPSTAGS.get(tag_id, str(tag_id)): _decode_value(value)
+                            for tag_id, value in gps.items()
+                        }
+
+                return True, extracted
 
         except FileNotFoundError:
             raise FileNotFoundError(f"Image not found: {image_path}")
         except Exception as error:
             logger.error("EXIF extraction error for %s: %s", image_path, error)
-            return {}
+            return False, {}
 
     def analyze(self, image_path: str) -> Dict[str, Any]:
         """
         Return raw EXIF metadata.
         If EXIF is missing, return an explicit status.
         """
-        exif = self.extract_exif(image_path)
+        has_exif, exif = self._read_exif(image_path)
 
-        if not exif:
+        if not has_exif:
             return {
                 "tool": "exif_analysis",
                 "image_path": str(Path(image_path).as_posix()),
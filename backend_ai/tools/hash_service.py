@@ -1,4 +1,15 @@
-import hashlib
+from blake3 import blake3
+
+# Digests are tagged with their algorithm so stored hashes stay comparable if it changes again
+HASH_PREFIX = "b3:"
+
+# Below this size Rayon's thread fan-out costs more than it saves
+MULTITHREAD_MIN_BYTES = 1 << 20
 
 def compute_hash(content: bytes):
-    return hashlib.sha256(content).hexdigest()
\ No newline at end of file
+    max_threads = blake3.AUTO if len(content) >= MULTITHREAD_MIN_BYTES else 1
+    return HASH_PREFIX + blake3(content, max_threads=max_threads).hexdigest()
+
+def compute_hash_path(path: str):
+    # Hash straight from an mmap of the file, without loading it into a bytes object
+    return HASH_PREFIX + blake3(max_threads=blake3.AUTO).update_mmap(path).hexdigest()
\ No newline at end of file
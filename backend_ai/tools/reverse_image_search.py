@@ -7,15 +7,17 @@ import os
 import re
 import io
 import base64
+import hashlib
 import logging
-import tempfile
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from typing import Optional
-from urllib.parse import urlparse
 from dotenv import load_dotenv
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import numpy as np
 from PIL import Image
-import imagehash
 
 logger = logging.getLogger(__name__)
 load_dotenv()
@@ -23,6 +25,18 @@ load_dotenv()
 
 SERPAPI_ENDPOINT = "https://serpapi.com/search"
 
+# Dollar amounts in listing titles, e.g. "$1,299.99"
+_PRICE_RE = re.compile(r"\$\s?([\d,]+(?:\.\d{1,2})?)")
+
+# Max thumbnails whose pHash is kept in memory, keyed by a digest of their bytes
+THUMBNAIL_HASH_CACHE_SIZE = 2048
+
+# pHash works on a (hash_size * PHASH_HIGHFREQ_FACTOR)² grayscale image
+PHASH_HIGHFREQ_FACTOR = 4
+
+# Host part of an http(s) URL, without a leading "www."
+_DOMAIN_RE = re.compile(r"^https?://(?:www\.)?([^/?#]+)", re.I)
+
 # Domains that suggest the image is stolen from a listing or stock site
 SUSPICIOUS_DOMAINS = {
     "shutterstock.com", "gettyimages.com", "istockphoto.com",
@@ -37,6 +51,45 @@ NEUTRAL_DOMAINS = {
 }
 
 
+# ── perceptual hash ──────────────────────────────────────────────────────────
+
+_DCT_BASIS_CACHE: dict[int, np.ndarray] = {}
+
+
+def _dct_basis(hash_size: int) -> np.ndarray:
+    """First hash_size rows of the (unnormalized) DCT-II matrix for the phash grid."""
+    basis = _DCT_BASIS_CACHE.get(hash_size)
+    if basis is None:
+        n = hash_size * PHASH_HIGHFREQ_FACTOR
+        k = np.arange(hash_size, dtype=np.float64)[:, None]
+        i = np.arange(n, dtype=np.float64)[None, :]
+        basis = np.cos(np.pi * k * (2 * i + 1) / (2 * n))
+        _DCT_BASIS_CACHE[hash_size] = basis
+    return basis
+
+
+def _phash(img: Image.Image, hash_size: int = 8) -> int:
+    """
+    Perceptual hash packed into an int (same bits as the imagehash library's phash).
+    Only the low-frequency hash_size x hash_size DCT block is computed,
+    as two small matrix products instead of a full 2-D DCT.
+    """
+    n = hash_size * PHASH_HIGHFREQ_FACTOR
+    pixels = np.asarray(img.convert("L").resize((n, n), Image.LANCZOS), dtype=np.float64)
+    basis = _dct_basis(hash_size)
+    lowfreq = basis @ pixels @ basis.T
+    bits = np.packbits(lowfreq > np.median(lowfreq))
+    return int.from_bytes(bits.tobytes(), "big")
+
+
+def _read_image_bytes(image) -> bytes:
+    """Bytes of an image path, or of an in-memory buffer from _resize_if_needed."""
+    if isinstance(image, io.BytesIO):
+        return image.getvalue()
+    with open(image, "rb") as f:
+        return f.read()
+
+
 # ── result dataclass ─────────────────────────────────────────────────────────
 
 @dataclass
@@ -72,18 +125,16 @@ class ReverseSearchResult:
 # ── main class ───────────────────────────────────────────────────────────────
 
 class ReverseImageSearcher:
-    def _upload_to_imgbb(self, image_path: str, api_key: Optional[str] = None) -> Optional[str]:
-        """Upload image to imgbb and return the public URL."""
-        api_key = api_key or os.getenv("IMGBB_API_KEY")
+    def _upload_to_imgbb(self, image: str | io.BytesIO, api_key: Optional[str] = None) -> Optional[str]:
+        """Upload an image (path or in-memory buffer) to imgbb and return the public URL."""
+        api_key = api_key or self.imgbb_api_key
         if not api_key:
             logger.error("IMGBB_API_KEY is required for imgbb uploads.")
             return None
-        with open(image_path, "rb") as img_file:
-            import base64
-            encoded = base64.b64encode(img_file.read()).decode("utf-8")
+        encoded = base64.b64encode(_read_image_bytes(image)).decode("utf-8")
         data = {"key": api_key, "image": encoded}
         try:
-            resp = requests.post(IMGBB_UPLOAD_URL, data=data)
+            resp = self._session.post(IMGBB_UPLOAD_URL, data=data)
             resp.raise_for_status()
             data = resp.json()
             return data["data"]["url"]
@@ -106,17 +157,39 @@ class ReverseImageSearcher:
     def __init__(
         self,
         serpapi_key: Optional[str] = None,
+        imgbb_api_key: Optional[str] = None,
         suspicious_threshold: float = 0.4,
         stolen_threshold: float = 0.7,
         max_image_size_kb: int = 1024,        # resize before upload if larger
         timeout: int = 15,                    # request timeout in seconds
     ):
         self.serpapi_key = serpapi_key or os.getenv("SERPAPI_KEY")
+        self.imgbb_api_key = imgbb_api_key or os.getenv("IMGBB_API_KEY")
         self.suspicious_threshold = suspicious_threshold
         self.stolen_threshold     = stolen_threshold
         self.max_image_size_kb    = max_image_size_kb
         self.timeout              = timeout
 
+        # Verdict lookup: searchsorted over the cutoffs indexes straight into _verdicts
+        self._verdict_thresholds = np.array([self.suspicious_threshold, self.stolen_threshold])
+        self._verdicts = ("clean", "suspicious", "stolen")
+
+        # Shared keep-alive session: imgbb, SerpAPI and thumbnail hosts reuse TCP/TLS connections
+        self._session = requests.Session()
+        self._session.headers.update({"Connection": "keep-alive"})
+        self._session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=8,
+                pool_maxsize=32,
+                # read=0: a SerpAPI search that timed out may still be billed, never re-send it
+                max_retries=Retry(total=2, read=0, backoff_factor=0.2),
+            ),
+        )
+
+        # Same thumbnail bytes served from different URLs → reuse the pHash
+        self._thumbnail_hash_cache: OrderedDict[tuple[bytes, int], int] = OrderedDict()
+
         if not self.serpapi_key:
             raise ValueError(
                 "SERPAPI_KEY is required. Set it as an environment variable or pass directly."
@@ -124,10 +197,10 @@ class ReverseImageSearcher:
 
     # ── image preparation ────────────────────────────────────────────────────
 
-    def _resize_if_needed(self, image_path: str) -> str:
+    def _resize_if_needed(self, image_path: str) -> str | io.BytesIO:
         """
         Resize image if it exceeds max_image_size_kb.
-        Returns path to (possibly resized) temp image.
+        Returns the original path, or the resized JPEG as an in-memory buffer.
         """
         size_kb = os.path.getsize(image_path) / 1024
         if size_kb <= self.max_image_size_kb:
@@ -139,40 +212,61 @@ class ReverseImageSearcher:
             new_size = (int(img.width * scale), int(img.height * scale))
             img = img.resize(new_size, Image.LANCZOS)
 
-            tmp = tempfile.NamedTemporaryFile(suffix=".jpg", delete=False)
-            img.save(tmp.name, format="JPEG", quality=85)
+            # Kept in memory: the resized copy is at most max_image_size_kb, no temp file to clean up
+            buf = io.BytesIO()
+            img.save(buf, format="JPEG", quality=85)
             logger.info(f"Resized image from {size_kb:.0f}KB → {self.max_image_size_kb}KB")
-            return tmp.name
+            buf.seek(0)
+            return buf
 
     def _image_to_base64(self, image_path: str) -> str:
         """Convert image to base64 string."""
         with open(image_path, "rb") as f:
             return base64.b64encode(f.read()).decode("utf-8")
 
-    def _compute_phash(self, image_path: str, hash_size: int = 8) -> Optional[imagehash.ImageHash]:
-        """Compute perceptual hash of local image."""
+    def _compute_phash(self, image: str | io.BytesIO, hash_size: int = 8) -> Optional[int]:
+        """Compute perceptual hash of a local image (path or in-memory buffer)."""
         try:
-            with Image.open(image_path) as img:
+            with Image.open(image) as img:
+                # phash resizes to 32x32 internally, so a cheap pre-shrink loses nothing
+                img.draft("RGB", (256, 256))
                 img = img.convert("RGB")
-                return imagehash.phash(img, hash_size=hash_size)
+                img.thumbnail((256, 256), Image.BOX)
+                return _phash(img, hash_size=hash_size)
         except Exception as e:
-            logger.error(f"Failed to compute pHash for {image_path}: {e}")
+            logger.error(f"Failed to compute pHash for {image}: {e}")
             return None
 
-    def _download_and_hash_thumbnail(self, thumbnail_url: str, hash_size: int = 8) -> Optional[imagehash.ImageHash]:
+    def _download_and_hash_thumbnail(self, thumbnail_url: str, hash_size: int = 8) -> Optional[int]:
         """Download thumbnail from URL and compute its perceptual hash."""
         if not thumbnail_url:
             return None
         try:
-            resp = requests.get(thumbnail_url, timeout=5)
+            resp = self._session.get(thumbnail_url, timeout=5)
             resp.raise_for_status()
-            img = Image.open(io.BytesIO(resp.content)).convert("RGB")
-            return imagehash.phash(img, hash_size=hash_size)
+
+            # Exact-duplicate fast path: a content digest is far cheaper than decode + DCT
+            key = (hashlib.blake2b(resp.content, digest_size=16).digest(), hash_size)
+            cached = self._thumbnail_hash_cache.get(key)
+            if cached is not None:
+                self._thumbnail_hash_cache.move_to_end(key)
+                return cached
+
+            img = Image.open(io.BytesIO(resp.content))
+            # JPEG only: let libjpeg decode at a reduced DCT scale, phash works on 32x32 anyway
+            img.draft("RGB", (64, 64))
+            img = img.convert("RGB")
+            phash = _phash(img, hash_size=hash_size)
+
+            self._thumbnail_hash_cache[key] = phash
+            if len(self._thumbnail_hash_cache) > THUMBNAIL_HASH_CACHE_SIZE:
+                self._thumbnail_hash_cache.popitem(last=False)
+            return phash
         except Exception as e:
             logger.debug(f"Failed to download/hash thumbnail {thumbnail_url}: {e}")
             return None
 
-    def _compute_similarity(self, hash1: imagehash.ImageHash, hash2: imagehash.ImageHash) -> float:
+    def _compute_similarity(self, hash1: Optional[int], hash2: Optional[int]) -> float:
         """
         Compute similarity score between two pHashes.
         Returns 0.0 (completely different) to 1.0 (identical).
@@ -180,17 +274,17 @@ class ReverseImageSearcher:
         """
         if hash1 is None or hash2 is None:
             return 0.0
-        hamming_distance = hash1 - hash2  # imagehash overloads __sub__ for hamming distance
+        hamming_distance = (hash1 ^ hash2).bit_count()
         max_distance = 64  # 8x8 hash = 64 bits
         similarity = 1.0 - (hamming_distance / max_distance)
         return max(0.0, min(1.0, similarity))
 
-    def _compare_with_matches(self, image_path: str, matches: list[dict], max_compare: int = 10) -> tuple[list[dict], float]:
+    def _compare_with_matches(self, image: str | io.BytesIO, matches: list[dict], max_compare: int = 10) -> tuple[list[dict], float]:
         """
-        Compare original image with thumbnails from matches using pHash.
+        Compare the image (path or in-memory buffer) with thumbnails from matches using pHash.
         Returns list of similarity results and average similarity score.
         """
-        original_hash = self._compute_phash(image_path)
+        original_hash = self._compute_phash(image)
         if original_hash is None:
             logger.warning("Could not compute hash for original image, skipping similarity check.")
             return [], 0.0
@@ -224,9 +318,10 @@ class ReverseImageSearcher:
 
     # ── SerpAPI ──────────────────────────────────────────────────────────────
 
-    def _search_serpapi(self, image_path: str) -> list[dict]:
+    def _search_serpapi(self, image: str | io.BytesIO) -> list[dict]:
         """
-        Run Google Reverse Image Search via SerpAPI using a public imgbb URL.
+        Run Google Reverse Image Search via SerpAPI using a public imgbb URL
+        for the image (path or in-memory buffer).
         Returns list of match dicts.
         """
         if not self.serpapi_key:
@@ -234,7 +329,7 @@ class ReverseImageSearcher:
             return []
 
         logger.info("Uploading image to imgbb for SerpAPI search...")
-        imgbb_url = self._upload_to_imgbb(image_path)
+        imgbb_url = self._upload_to_imgbb(image)
         if not imgbb_url:
             logger.error("Failed to upload image to imgbb. Aborting search.")
             return []
@@ -249,7 +344,7 @@ class ReverseImageSearcher:
         }
 
         try:
-            resp = requests.get(
+            resp = self._session.get(
                 SERPAPI_ENDPOINT,
                 params=params,
                 timeout=self.timeout,
@@ -290,18 +385,14 @@ class ReverseImageSearcher:
 
     def _extract_domain(self, url: str) -> str:
         """Extract root domain from URL."""
-        try:
-            return urlparse(url).netloc.replace("www.", "")
-        except Exception:
-            return ""
+        m = _DOMAIN_RE.match(url)
+        return m.group(1).lower() if m else ""
 
     def _extract_price(self, matches: list[dict]) -> Optional[float]:
         """
         Try to extract a market price from listing matches.
         Looks for price patterns in titles and explicit price fields.
         """
-        price_pattern = re.compile(r"\$\s?([\d,]+(?:\.\d{1,2})?)")
-
         for match in matches:
             # Check explicit price field (Bing shopping)
             if match.get("price") and isinstance(match["price"], (int, float)):
@@ -309,7 +400,7 @@ class ReverseImageSearcher:
 
             # Check title for price string
             title = match.get("title", "")
-            found = price_pattern.findall(title)
+            found = _PRICE_RE.findall(title)
             if found:
                 try:
                     return float(found[0].replace(",", ""))
@@ -400,12 +491,9 @@ class ReverseImageSearcher:
 
         score = min(score, 1.0)
 
-        if score >= self.stolen_threshold:
-            verdict = "stolen"
-        elif score >= self.suspicious_threshold:
-            verdict = "suspicious"
-        else:
-            verdict = "clean"
+        verdict = self._verdicts[
+            int(np.searchsorted(self._verdict_thresholds, score, side="right"))
+        ]
 
         if not notes_parts:
             notes = "Image appears original, no concerning web matches."
@@ -424,26 +512,21 @@ class ReverseImageSearcher:
         """
         logger.info(f"Starting reverse image search for: {image_path}")
 
-        resized_path = self._resize_if_needed(image_path)
-        all_matches = []
+        resized = self._resize_if_needed(image_path)
         engine_used = "serpapi"
 
-        # Only SerpAPI
-        serp_matches = self._search_serpapi(resized_path)
-        if serp_matches:
-            all_matches.extend(serp_matches)
-
-        # Deduplicate by URL
+        # Only SerpAPI — deduplicate by URL as matches come in
         seen_urls = set()
         deduped = []
-        for m in all_matches:
+        for m in self._search_serpapi(resized):
             url = m.get("url", "")
             if url and url not in seen_urls:
                 seen_urls.add(url)
                 deduped.append(m)
 
         # Compute visual similarity between original image and matched thumbnails
-        similarity_scores, avg_similarity = self._compare_with_matches(image_path, deduped)
+        # The resized copy (if any) is a faithful enough stand-in for perceptual hashing
+        similarity_scores, avg_similarity = self._compare_with_matches(resized, deduped)
 
         suspicious_sources, suspicion_score, verdict, notes = self._analyze_matches(
             deduped, similarity_scores, avg_similarity
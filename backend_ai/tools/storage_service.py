@@ -1,15 +1,22 @@
 import os
 
 BASE_PATH = "data/temp_uploads"
+CHUNK_SIZE = 1 << 20  # 1 MiB
 
 def store_file(content, session_id, filename, file_type):
+    # content: bytes, or a readable file-like object streamed in CHUNK_SIZE pieces.
 
     folder = os.path.join(BASE_PATH, session_id, file_type)
     os.makedirs(folder, exist_ok=True)
 
     path = os.path.join(folder, filename)
 
-    with open(path, "wb") as f:
-        f.write(content)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    with os.fdopen(fd, "wb", buffering=CHUNK_SIZE) as f:
+        if hasattr(content, "read"):
+            while chunk := content.read(CHUNK_SIZE):
+                f.write(chunk)
+        else:
+            f.write(content)
 
     return path
\ No newline at end of file
@@ -1,16 +1,36 @@
 
+import asyncio
 import base64
+import io
+import json
 import logging
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from typing import Optional
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from PIL import Image
 from dotenv import load_dotenv
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+# Markdown code fences around model output, and the outermost {...} object
+_JSON_FENCE_RE = re.compile(r"```(?:json)?|```")
+_JSON_OBJ_RE = re.compile(r"\{.*\}", re.DOTALL)
+_JSON_ARRAY_RE = re.compile(r"\[.*\]", re.DOTALL)
+
+JPEG_DATA_URL_PREFIX = "data:image/jpeg;base64,"
+
+# Upper bound on threads preparing images for a batch call
+PREPARE_MAX_WORKERS = 8
+
+# JPEGs already within max_image_size and below this size skip the re-encode
+PASSTHROUGH_MAX_BYTES = 2_000_000
+
 
 @dataclass
 class VisionAnalysisResult:
@@ -71,6 +91,21 @@ Guidelines:
 - Flag any signs of reproduction, modern materials in old items, or inconsistent aging
 """
 
+# Same instructions, several images in one request → one JSON object per image
+VISION_BATCH_PROMPT = VISION_PROMPT.replace(
+    "Analyze this image and provide a structured assessment.",
+    "You are given several images, each showing a separate item.\n"
+    "Analyze each image independently and provide a structured assessment for each.",
+).replace(
+    "You MUST respond in this exact JSON format and nothing else:",
+    "You MUST respond with a JSON array holding one object per image, in the same order\n"
+    "as the images, and nothing else. Each object uses this exact format:",
+)
+
+# Prompt message parts, built once and shared by every request
+_VISION_PROMPT_PART = {"type": "text", "text": VISION_PROMPT}
+_VISION_BATCH_PROMPT_PART = {"type": "text", "text": VISION_BATCH_PROMPT}
+
 
 class VisionAnalyzer:
     """
@@ -94,16 +129,72 @@ class VisionAnalyzer:
         self.max_image_size = max_image_size
         self.api_url = "https://openrouter.ai/api/v1/chat/completions"
 
+        # Keep-alive session so repeated OpenRouter calls skip the TLS handshake.
+        # Transient failures (rate limits, gateway errors) are retried with exponential
+        # backoff, honouring Retry-After, instead of falling back to the "unknown" result.
+        self.session = requests.Session()
+        self.session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=8,
+                max_retries=Retry(
+                    total=3,
+                    connect=3,
+                    # A read timeout means the completion may still be running (and billed):
+                    # never re-POST it, only retry connection errors and the statuses below
+                    read=0,
+                    status=3,
+                    backoff_factor=1.0,
+                    status_forcelist=[408, 425, 429, 500, 502, 503, 504],
+                    allowed_methods=frozenset({"POST"}),
+                    respect_retry_after_header=True,
+                ),
+            ),
+        )
+        # Constant request headers, set once instead of rebuilt per call
+        self.session.headers.update({
+            "Authorization": f"Bearer {self.openrouter_api_key}",
+            "HTTP-Referer": "https://auction-platform.local",
+            "X-Title": "Auction Image Validator",
+        })
+
+    def close(self) -> None:
+        """Release pooled HTTP connections."""
+        self.session.close()
+
+    def __enter__(self) -> "VisionAnalyzer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
     def _prepare_image_base64(self, image_path: str) -> str:
         """Resize if needed and convert to base64 data URL."""
         with Image.open(image_path) as img:
+            # Small RGB JPEGs are sent as-is: opening only parses the header,
+            # so this skips a full decode + re-encode pass. Only without metadata:
+            # EXIF/XMP (APP1, incl. GPS) must not leave with the file, the re-encode strips it
+            if (
+                img.format == "JPEG"
+                and img.mode in ("RGB", "L")
+                and "exif" not in img.info
+                and not any(marker == "APP1" for marker, _ in img.applist)
+                and max(img.size) <= max(self.max_image_size)
+                and os.path.getsize(image_path) < PASSTHROUGH_MAX_BYTES
+            ):
+                with open(image_path, "rb") as f:
+                    return JPEG_DATA_URL_PREFIX + base64.b64encode(f.read()).decode("ascii")
+
+            # JPEG: let libjpeg decode straight at a reduced DCT scale (no full-res decode)
+            img.draft("RGB", self.max_image_size)
             img = img.convert("RGB")
-            img.thumbnail(self.max_image_size, Image.LANCZOS)
-            import io
+            # draft() already supersampled, so BICUBIC is enough here
+            img.thumbnail(self.max_image_size, Image.BICUBIC)
             buffer = io.BytesIO()
-            img.save(buffer, format="JPEG", quality=90)
-            b64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
-            return f"data:image/jpeg;base64,{b64}"
+            img.save(buffer, format="JPEG", quality=82)
+            # getbuffer() is a zero-copy view; base64 output is pure ASCII
+            return JPEG_DATA_URL_PREFIX + base64.b64encode(buffer.getbuffer()).decode("ascii")
 
     # ── OpenRouter Mistral ───────────────────────────────────────────────────
 
@@ -116,46 +207,53 @@ class VisionAnalyzer:
         logger.info(f"Calling OpenRouter ({self.model})...")
 
         image_data_url = self._prepare_image_base64(image_path)
+        return self._post_openrouter(_VISION_PROMPT_PART, [image_data_url], max_tokens=2000)
 
-        headers = {
-            "Authorization": f"Bearer {self.openrouter_api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://auction-platform.local",
-            "X-Title": "Auction Image Validator",
-        }
+    def _analyze_openrouter_batch(self, image_paths: list[str]) -> dict:
+        """Call OpenRouter once with every image attached to the same message."""
+        if not self.openrouter_api_key:
+            logger.error("OPENROUTER_API_KEY not set.")
+            return {}
+
+        logger.info(f"Calling OpenRouter ({self.model}) with {len(image_paths)} images...")
 
+        # Decode/resize/encode is CPU-bound but Pillow's codecs release the GIL
+        workers = min(PREPARE_MAX_WORKERS, os.cpu_count() or 1, len(image_paths))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            image_data_urls = list(pool.map(self._prepare_image_base64, image_paths))
+        return self._post_openrouter(
+            _VISION_BATCH_PROMPT_PART, image_data_urls, max_tokens=2000 * len(image_paths)
+        )
+
+    def _post_openrouter(self, prompt_part: dict, image_data_urls: list[str], max_tokens: int) -> dict:
+        """POST one chat completion (prompt + images) and return the raw model text."""
+        # Only the image parts are built per call; headers live on the session
         payload = {
             "model": self.model,
             "messages": [
                 {
                     "role": "user",
                     "content": [
-                        {
-                            "type": "text",
-                            "text": VISION_PROMPT
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": image_data_url
-                            }
-                        }
-                    ]
+                        prompt_part,
+                        *(
+                            {"type": "image_url", "image_url": {"url": url}}
+                            for url in image_data_urls
+                        ),
+                    ],
                 }
             ],
             "temperature": 0.1,
-            "max_tokens": 2000,
+            "max_tokens": max_tokens,
         }
 
         try:
-            resp = requests.post(
+            resp = self.session.post(
                 self.api_url,
-                headers=headers,
                 json=payload,
                 timeout=60,
             )
             resp.raise_for_status()
-            data = resp.json()
+            data = orjson.loads(resp.content)
             raw = data["choices"][0]["message"]["content"]
             return {"raw": raw, "engine": "openrouter_mistral"}
         except requests.RequestException as e:
@@ -163,7 +261,7 @@ class VisionAnalyzer:
             if hasattr(e, 'response') and e.response is not None:
                 logger.error(f"Response: {e.response.text}")
             return {}
-        except (KeyError, IndexError) as e:
+        except (KeyError, IndexError, orjson.JSONDecodeError) as e:
             logger.error(f"Failed to parse OpenRouter response: {e}")
             return {}
 
@@ -171,16 +269,14 @@ class VisionAnalyzer:
 
     def _parse_response(self, raw: str) -> dict:
         """Parse JSON response from vision model, handle malformed output."""
-        import json
-
         # Strip markdown fences if present
-        clean = re.sub(r"```(?:json)?|```", "", raw).strip()
+        clean = _JSON_FENCE_RE.sub("", raw).strip()
 
         try:
-            return json.loads(clean)
-        except json.JSONDecodeError:
-            # Try to extract JSON object with regex
-            match = re.search(r"\{.*\}", clean, re.DOTALL)
+            return orjson.loads(clean)
+        except orjson.JSONDecodeError:
+            # Try to extract JSON object with regex (stdlib json is more lenient here)
+            match = _JSON_OBJ_RE.search(clean)
             if match:
                 try:
                     return json.loads(match.group())
@@ -190,6 +286,31 @@ class VisionAnalyzer:
         logger.warning("Could not parse vision model JSON response.")
         return {}
 
+    def _parse_batch_response(self, raw: str, count: int) -> list[dict]:
+        """Parse the JSON array of a batch call; [] unless it has exactly `count` objects."""
+        clean = _JSON_FENCE_RE.sub("", raw).strip()
+
+        try:
+            parsed = orjson.loads(clean)
+        except orjson.JSONDecodeError:
+            parsed = None
+            match = _JSON_ARRAY_RE.search(clean)
+            if match:
+                try:
+                    parsed = json.loads(match.group())
+                except json.JSONDecodeError:
+                    pass
+
+        if (
+            isinstance(parsed, list)
+            and len(parsed) == count
+            and all(isinstance(item, dict) for item in parsed)
+        ):
+            return parsed
+
+        logger.warning("Could not parse vision model batch JSON response.")
+        return []
+
     def _build_result(self, parsed: dict, engine: str, raw: str) -> VisionAnalysisResult:
         """Build VisionAnalysisResult from parsed model output."""
         authenticity_score = float(parsed.get("authenticity_score", 0.5))
@@ -242,6 +363,36 @@ class VisionAnalyzer:
             full_report="Vision analysis unavailable.",
             engine_used="none",
         )
+
+    def analyze_batch(self, image_paths: list[str]) -> list[VisionAnalysisResult]:
+        """
+        Run vision analysis on several images with a single OpenRouter call.
+        Results come back in input order; if the batch reply can't be used,
+        each image falls back to its own analyze() call.
+        """
+        if len(image_paths) <= 1:
+            return [self.analyze(p) for p in image_paths]
+
+        logger.info(f"Running batch vision analysis on {len(image_paths)} images")
+
+        result = self._analyze_openrouter_batch(image_paths)
+        if result:
+            parsed_items = self._parse_batch_response(result["raw"], len(image_paths))
+            if parsed_items:
+                return [
+                    self._build_result(parsed, result["engine"], result["raw"])
+                    for parsed in parsed_items
+                ]
+
+        logger.warning("Batch vision analysis failed, analyzing images one by one.")
+        return [self.analyze(p) for p in image_paths]
+
+    async def analyze_async(self, image_path: str) -> VisionAnalysisResult:
+        """
+        Awaitable analyze() for async callers.
+        Runs off the event loop so several analyses can be in flight at once.
+        """
+        return await asyncio.to_thread(self.analyze, image_path)
     
 # ----------------------------------------
 # Example usage for testing
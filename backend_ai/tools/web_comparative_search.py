@@ -1,10 +1,25 @@
 # verifier_tools/web_comparative_search.py
 
+import asyncio
+import functools
+import hashlib
+import json
 import logging
 import os
+import re
+import stat
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Optional
+from itertools import islice
+from typing import Any, Optional
+import ijson
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +29,132 @@ HARVARD_ENDPOINT      = "https://api.harvardartmuseums.org/object"
 WIKIPEDIA_ENDPOINT    = "https://en.wikipedia.org/api/rest_v1/page/summary"
 SERPER_ENDPOINT       = "https://google.serper.dev/search"
 
+# Prices in auction snippets, e.g. "$12,500", "£900.50", "€ 1,200"
+_PRICE_RE = re.compile(r"[\$£€]\s?([\d,]+(?:\.\d{1,2})?)")
+
+# Lookup cache: same (source, query) → same answer, so skip the network on repeats.
+# Files live in a per-user directory (0700); set WEB_SEARCH_CACHE_DIR="" to keep the cache in memory only.
+SEARCH_CACHE_DIR      = os.getenv(
+    "WEB_SEARCH_CACHE_DIR",
+    os.path.join(os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "encher-sceller", "webcache"),
+)
+SEARCH_CACHE_TTL      = 7 * 24 * 3600   # seconds
+SEARCH_CACHE_MAXSIZE  = 1024            # entries kept in memory
+
+MUSEUM_RESULTS_LIMIT  = 3               # records kept per museum source
+
+
+def _private_cache_dir(directory: str) -> str:
+    """
+    Create the cache directory owner-only and refuse one that other users could write to,
+    since cache keys are predictable. Returns "" (memory only) when the directory is unsafe.
+    """
+    if not directory:
+        return ""
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        st = os.stat(directory)
+    except OSError as e:
+        logger.warning(f"Search cache directory unavailable, using memory only: {e}")
+        return ""
+    if st.st_uid != os.getuid() or st.st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+        logger.warning(f"Search cache directory {directory} is not private to this user, using memory only")
+        return ""
+    return directory
+
+
+class _SearchCache:
+    """
+    Two-tier cache for deterministic lookups: in-memory LRU + JSON files on disk.
+    Values are stored serialized, so every hit hands back a fresh copy.
+    """
+
+    def __init__(self, directory: str, ttl: int, maxsize: int):
+        self.directory = _private_cache_dir(directory)
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, key: str, stored_at: float, payload: str) -> None:
+        with self._lock:
+            self._memory[key] = (stored_at, payload)
+            self._memory.move_to_end(key)
+            if len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._memory.move_to_end(key)
+                return json.loads(entry[1])
+
+        if not self.directory:
+            return None
+        path = os.path.join(self.directory, f"{key}.json")
+        try:
+            stored_at = os.path.getmtime(path)
+            if now - stored_at >= self.ttl:
+                return None
+            with open(path, encoding="utf-8") as f:
+                payload = f.read()
+            value = json.loads(payload)
+        except (OSError, ValueError):
+            return None
+        self._remember(key, stored_at, payload)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        payload = json.dumps(value)
+        self._remember(key, time.time(), payload)
+
+        if not self.directory:
+            return
+        path = os.path.join(self.directory, f"{key}.json")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.debug(f"Could not persist search cache entry: {e}")
+
+
+_search_cache = _SearchCache(SEARCH_CACHE_DIR, SEARCH_CACHE_TTL, SEARCH_CACHE_MAXSIZE)
+
+
+def _stream_items(resp: requests.Response, prefix: str, limit: int) -> list:
+    """
+    Parse only the first `limit` elements of the JSON array at `prefix`
+    straight off the socket of a `stream=True` response.
+    """
+    resp.raw.decode_content = True
+    return list(islice(ijson.items(resp.raw, prefix), limit))
+
+
+def _cached_search(method):
+    """
+    Cache a lookup method on its arguments.
+    Empty results are not cached: they are also what a failed request returns.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        raw_key = repr((method.__name__, args, sorted(kwargs.items())))
+        key = hashlib.blake2b(raw_key.encode("utf-8"), digest_size=16).hexdigest()
+
+        cached = _search_cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = method(self, *args, **kwargs)
+        if result:
+            _search_cache.set(key, result)
+        return result
+
+    return wrapper
+
 
 @dataclass
 class ComparativeSearchResult:
@@ -68,44 +209,94 @@ class WebComparativeSearcher:
         self.harvard_key   = harvard_api_key   or os.getenv("HARVARD_API_KEY")
         self.timeout = timeout
 
+        # One keep-alive session for every museum / search endpoint.
+        # Serper is a POST, so POST is retried too (rate limits, gateway errors).
+        self.session = requests.Session()
+        self.session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=20,
+                pool_maxsize=20,
+                max_retries=Retry(
+                    total=3,
+                    connect=3,
+                    # A read timeout may be a billed Serper call still running: never re-send it
+                    read=0,
+                    status=3,
+                    backoff_factor=0.5,
+                    status_forcelist=[408, 425, 429, 500, 502, 503, 504],
+                    allowed_methods=frozenset({"GET", "POST"}),
+                    respect_retry_after_header=True,
+                ),
+            ),
+        )
+
+        # Long-lived workers for the Met detail fetches (no thread spawn per search)
+        self._met_pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix="met")
+
+    def close(self) -> None:
+        """Release pooled HTTP connections and worker threads."""
+        self._met_pool.shutdown(wait=False)
+        self.session.close()
+
+    def __enter__(self) -> "WebComparativeSearcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
     # ── Metropolitan Museum (free, no key) ───────────────────────────────────
 
+    @_cached_search
     def _search_met(self, query: str) -> list[dict]:
         """Search Met Museum open collection."""
         logger.info(f"Searching Met Museum for: {query}")
         try:
-            search_resp = requests.get(
+            with self.session.get(
                 f"{MET_ENDPOINT}/search",
                 params={"q": query, "hasImages": True},
                 timeout=self.timeout,
-            )
-            search_resp.raise_for_status()
-            object_ids = search_resp.json().get("objectIDs") or []
-
-            results = []
-            for obj_id in object_ids[:3]:    # limit to 3 to save time
-                obj_resp = requests.get(
-                    f"{MET_ENDPOINT}/objects/{obj_id}",
-                    timeout=self.timeout,
-                )
-                if obj_resp.ok:
-                    obj = obj_resp.json()
-                    results.append({
-                        "source": "Metropolitan Museum",
-                        "title": obj.get("title"),
-                        "period": obj.get("period") or obj.get("objectDate"),
-                        "medium": obj.get("medium"),
-                        "url": obj.get("objectURL"),
-                        "image": obj.get("primaryImageSmall"),
-                        "artist": obj.get("artistDisplayName"),
-                    })
-            return results
-        except requests.RequestException as e:
+                stream=True,
+            ) as search_resp:
+                search_resp.raise_for_status()
+                # objectIDs can hold thousands of ids; stop reading after the first few
+                object_ids = _stream_items(search_resp, "objectIDs.item", MUSEUM_RESULTS_LIMIT)
+
+            # the detail fetches are independent, so run them together
+            objects = self._met_pool.map(self._fetch_met_object, object_ids)
+            return [obj for obj in objects if obj]
+        except (requests.RequestException, ijson.JSONError) as e:
             logger.error(f"Met API error: {e}")
             return []
 
+    @_cached_search
+    def _fetch_met_object(self, obj_id: int) -> Optional[dict]:
+        """Fetch one Met object record. Records are immutable, so they are cached by id."""
+        try:
+            obj_resp = self.session.get(
+                f"{MET_ENDPOINT}/objects/{obj_id}",
+                timeout=self.timeout,
+            )
+            if not obj_resp.ok:
+                return None
+            obj = orjson.loads(obj_resp.content)
+        except (requests.RequestException, orjson.JSONDecodeError) as e:
+            logger.error(f"Met object {obj_id} error: {e}")
+            return None
+
+        return {
+            "source": "Metropolitan Museum",
+            "title": obj.get("title"),
+            "period": obj.get("period") or obj.get("objectDate"),
+            "medium": obj.get("medium"),
+            "url": obj.get("objectURL"),
+            "image": obj.get("primaryImageSmall"),
+            "artist": obj.get("artistDisplayName"),
+        }
+
     # ── Europeana (free, needs key) ───────────────────────────────────────────
 
+    @_cached_search
     def _search_europeana(self, query: str) -> list[dict]:
         """Search Europeana — 50M+ museum objects across Europe."""
         if not self.europeana_key:
@@ -114,19 +305,20 @@ class WebComparativeSearcher:
 
         logger.info(f"Searching Europeana for: {query}")
         try:
-            resp = requests.get(
+            # rows caps the payload server-side: read it whole so the connection goes back to the pool
+            resp = self.session.get(
                 EUROPEANA_ENDPOINT,
                 params={
                     "query": query,
                     "wskey": self.europeana_key,
-                    "rows": 3,
+                    "rows": MUSEUM_RESULTS_LIMIT,
                     "media": True,
                     "profile": "rich",
                 },
                 timeout=self.timeout,
             )
             resp.raise_for_status()
-            items = resp.json().get("items", [])
+            items = (orjson.loads(resp.content).get("items") or [])[:MUSEUM_RESULTS_LIMIT]
 
             return [
                 {
@@ -139,12 +331,13 @@ class WebComparativeSearcher:
                 }
                 for item in items
             ]
-        except requests.RequestException as e:
+        except (requests.RequestException, orjson.JSONDecodeError) as e:
             logger.error(f"Europeana error: {e}")
             return []
 
     # ── Harvard Art Museums (free, needs key) ────────────────────────────────
 
+    @_cached_search
     def _search_harvard(self, query: str) -> list[dict]:
         """Search Harvard Art Museums collection."""
         if not self.harvard_key:
@@ -153,18 +346,19 @@ class WebComparativeSearcher:
 
         logger.info(f"Searching Harvard Art Museums for: {query}")
         try:
-            resp = requests.get(
+            # size caps the payload server-side, as for Europeana
+            resp = self.session.get(
                 HARVARD_ENDPOINT,
                 params={
                     "apikey": self.harvard_key,
                     "keyword": query,
-                    "size": 3,
+                    "size": MUSEUM_RESULTS_LIMIT,
                     "fields": "title,dated,medium,url,primaryimageurl,people",
                 },
                 timeout=self.timeout,
             )
             resp.raise_for_status()
-            records = resp.json().get("records", [])
+            records = (orjson.loads(resp.content).get("records") or [])[:MUSEUM_RESULTS_LIMIT]
 
             return [
                 {
@@ -177,28 +371,30 @@ class WebComparativeSearcher:
                 }
                 for r in records
             ]
-        except requests.RequestException as e:
+        except (requests.RequestException, orjson.JSONDecodeError) as e:
             logger.error(f"Harvard API error: {e}")
             return []
 
     # ── Wikipedia ────────────────────────────────────────────────────────────
 
+    @_cached_search
     def _search_wikipedia(self, query: str) -> str:
         """Fetch Wikipedia summary for context."""
         logger.info(f"Searching Wikipedia for: {query}")
         try:
-            resp = requests.get(
+            resp = self.session.get(
                 f"{WIKIPEDIA_ENDPOINT}/{query.replace(' ', '_')}",
                 timeout=self.timeout,
             )
             if resp.ok:
-                return resp.json().get("extract", "")
-        except requests.RequestException:
+                return orjson.loads(resp.content).get("extract", "")
+        except (requests.RequestException, orjson.JSONDecodeError):
             pass
         return ""
 
     # ── Serper (auction houses + stolen art) ─────────────────────────────────
 
+    @_cached_search
     def _serper_search(self, query: str, num: int = 5) -> list[dict]:
         """Run a web search via Serper.dev."""
         if not self.serper_key:
@@ -206,7 +402,7 @@ class WebComparativeSearcher:
             return []
 
         try:
-            resp = requests.post(
+            resp = self.session.post(
                 SERPER_ENDPOINT,
                 headers={
                     "X-API-KEY": self.serper_key,
@@ -216,8 +412,8 @@ class WebComparativeSearcher:
                 timeout=self.timeout,
             )
             resp.raise_for_status()
-            return resp.json().get("organic", [])
-        except requests.RequestException as e:
+            return orjson.loads(resp.content).get("organic", [])
+        except (requests.RequestException, orjson.JSONDecodeError) as e:
             logger.error(f"Serper error for query '{query}': {e}")
             return []
 
@@ -227,11 +423,10 @@ class WebComparativeSearcher:
         results = self._serper_search(query, num=6)
 
         comparables = []
-        price_pattern = __import__("re").compile(r"[\$£€]\s?([\d,]+(?:\.\d{1,2})?)")
 
         for r in results:
             snippet = r.get("snippet", "")
-            prices = price_pattern.findall(snippet)
+            prices = _PRICE_RE.findall(snippet)
             comparables.append({
                 "source": "Christie's/Sotheby's",
                 "title": r.get("title"),
@@ -340,16 +535,29 @@ class WebComparativeSearcher:
         )
 
         query = f"{object_type} {period}"
-        sources_checked = []
 
-        # Run all searches
-        met_results       = self._search_met(query);           sources_checked.append("Met Museum")
-        europeana_results = self._search_europeana(query);     sources_checked.append("Europeana")
-        harvard_results   = self._search_harvard(query);       sources_checked.append("Harvard Art Museums")
-        wiki_context      = self._search_wikipedia(query);     sources_checked.append("Wikipedia")
-        auction_comps     = self._search_auction_houses(object_type, period); sources_checked.append("Christie's/Sotheby's")
-        stolen_flags      = self._search_stolen_registries(object_type);      sources_checked.append("Interpol/ALR")
-        publications      = self._search_publications(object_type, period);   sources_checked.append("Web Publications")
+        # Run all searches concurrently — they are independent network calls
+        searches = {
+            "Met Museum":           (self._search_met, (query,)),
+            "Europeana":            (self._search_europeana, (query,)),
+            "Harvard Art Museums":  (self._search_harvard, (query,)),
+            "Wikipedia":            (self._search_wikipedia, (query,)),
+            "Christie's/Sotheby's": (self._search_auction_houses, (object_type, period)),
+            "Interpol/ALR":         (self._search_stolen_registries, (object_type,)),
+            "Web Publications":     (self._search_publications, (object_type, period)),
+        }
+        with ThreadPoolExecutor(max_workers=len(searches)) as pool:
+            futures = {name: pool.submit(fn, *args) for name, (fn, args) in searches.items()}
+            results = {name: future.result() for name, future in futures.items()}
+        sources_checked = list(searches)
+
+        met_results       = results["Met Museum"]
+        europeana_results = results["Europeana"]
+        harvard_results   = results["Harvard Art Museums"]
+        wiki_context      = results["Wikipedia"]
+        auction_comps     = results["Christie's/Sotheby's"]
+        stolen_flags      = results["Interpol/ALR"]
+        publications      = results["Web Publications"]
 
         museum_matches = met_results + europeana_results + harvard_results
 
@@ -380,4 +588,16 @@ class WebComparativeSearcher:
             sources_checked=sources_checked,
         )
 
-        
\ No newline at end of file
+        
+
+    async def analyze_async(
+        self,
+        object_type: str,
+        period: str,
+        category: str,
+    ) -> ComparativeSearchResult:
+        """
+        Awaitable analyze() for async callers (FastAPI handlers, agent pipelines).
+        The blocking searches run off the event loop; concurrent calls share the session pool.
+        """
+        return await asyncio.to_thread(self.analyze, object_type, period, category)
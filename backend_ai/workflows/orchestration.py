@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from backend_ai.tools.exif_analysis import ExifAnalyzer
+from backend_ai.tools.vision_analyzer import VisionAnalyzer
+from backend_ai.tools.web_comparative_search import WebComparativeSearcher
+
+
+def analyze_all(
+    image_path,
+    category="",
+    exif_analyzer=None,
+    vision_analyzer=None,
+    comparative_searcher=None,
+):
+    """
+    EXIF -> vision -> web comparative search, run as a small dependency graph:
+    the local EXIF parse overlaps the (slow) vision call, and the web search
+    starts as soon as vision has identified the object and period. The search
+    is skipped when vision returns "unknown", since there is nothing to query.
+
+    Analyzers not passed in are created for this call and closed on return
+    (HTTP sessions, the searcher's Met pool); injected ones are left open.
+    """
+    exif_analyzer = exif_analyzer or ExifAnalyzer()
+
+    with ExitStack() as owned, ThreadPoolExecutor(max_workers=1) as pool:
+        if vision_analyzer is None:
+            vision_analyzer = owned.enter_context(VisionAnalyzer())
+        if comparative_searcher is None:
+            comparative_searcher = owned.enter_context(WebComparativeSearcher())
+
+        exif_future = pool.submit(exif_analyzer.analyze, image_path)
+
+        vision = vision_analyzer.analyze(image_path)
+
+        comparative = None
+        if vision.object_type != "unknown":
+            comparative = comparative_searcher.analyze(
+                vision.object_type, vision.estimated_period, category
+            )
+
+        exif = exif_future.result()
+
+    return {
+        "exif": exif,
+        "vision": vision,
+        "comparative_search": comparative,
+    }
@@ -1,53 +1,67 @@
+import asyncio
+
 from backend_ai.tools.id_generator import generate_session_id
 from backend_ai.tools.image_validator import validate_image
-from backend_ai.tools.image_compressor import compress_image
+from backend_ai.tools.image_compressor import compress_image, compress_document_stream, ZSTD_SUFFIX
 from backend_ai.tools.storage_service import store_file
 from backend_ai.tools.hash_service import compute_hash
 
-async def handle_upload(title, description, category, images, documents):
+def _process_image(src, filename, session_id):
 
-    session_id = generate_session_id()
+    # Decoding needs the encoded bytes anyway: one read serves both hash and decode.
+    # Only the images in flight are held in memory
+    content = src.read()
 
-    stored_images = []
-    image_hashes = []
+    # Hash pour traçabilité
+    file_hash = compute_hash(content)
 
-    for img in images:
-        content = await img.read()
+    # Validation technique
+    validate_image(content)
 
-        # Validation technique
-        validate_image(content)
+    # Compression
+    compressed = compress_image(content)
 
-        # Hash pour traçabilité
-        file_hash = compute_hash(content)
-        image_hashes.append(file_hash)
+    # Stockage
+    path = store_file(
+        compressed,
+        session_id,
+        filename,
+        "images"
+    )
 
-        # Compression
-        compressed = compress_image(content)
+    return path, file_hash
 
-        # Stockage
-        path = store_file(
-            compressed,
-            session_id,
-            img.filename,
-            "images"
-        )
+def _process_document(src, filename, session_id):
 
-        stored_images.append(path)
+    # Compression zstd en flux, signalée par l'extension .zst
+    return store_file(
+        compress_document_stream(src),
+        session_id,
+        filename + ZSTD_SUFFIX,
+        "documents"
+    )
 
-    stored_documents = []
+async def handle_upload(title, description, category, images, documents):
 
-    if documents:
-        for doc in documents:
-            content = await doc.read()
+    session_id = generate_session_id()
+
+    # Images are independent: hash/decode/compress/write them concurrently in worker threads,
+    # reading straight from each upload's file object rather than buffering every upload first
+    results = await asyncio.gather(*(
+        asyncio.to_thread(_process_image, img.file, img.filename, session_id)
+        for img in images
+    ))
 
-            path = store_file(
-                content,
-                session_id,
-                doc.filename,
-                "documents"
-            )
+    stored_images = [path for path, _ in results]
+    image_hashes = [file_hash for _, file_hash in results]
 
-            stored_documents.append(path)
+    stored_documents = []
+
+    if documents:
+        stored_documents = await asyncio.gather(*(
+            asyncio.to_thread(_process_document, doc.file, doc.filename, session_id)
+            for doc in documents
+        ))
 
     return {
         "session_id": session_id,
@@ -1,17 +1,31 @@
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
 
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
+from backend_api.core.config import settings
 from backend_api.database.mongo import get_users_collection
 
-SECRET_KEY = "votre-secret-jwt-a-changer-en-production-32-caracteres-min"
+SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = "HS256"
+# Clé HMAC construite une fois : jose ne la re-dérive plus (ni ne tente un json.loads) à chaque token
+_JWT_KEY = jwk.construct(SECRET_KEY, ALGORITHM)
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 jours
 
+# Cache des utilisateurs authentifiés : évite un find_one Mongo à chaque requête
+USER_CACHE_TTL = 30          # secondes : délai max avant qu'un changement de rôle ou une suppression soit vu
+USER_CACHE_MAXSIZE = 10_000
+_user_cache: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+
+# Cache des tokens déjà vérifiés : token -> payload, valable jusqu'à son "exp"
+TOKEN_CACHE_MAXSIZE = 4096
+_token_cache: "OrderedDict[str, dict]" = OrderedDict()
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 bearer_scheme = HTTPBearer(auto_error=False)
 
@@ -24,11 +38,53 @@ def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
 
+def dummy_verify_password() -> None:
+    """
+    Verify bcrypt factice : email inconnu et mauvais mot de passe prennent le même temps.
+    Appelé aussi au démarrage pour résoudre le backend bcrypt et calculer le hash factice une fois.
+    """
+    pwd_context.dummy_verify()
+
+
+async def _load_user(user_id: str) -> Optional[dict]:
+    now = time.monotonic()
+    entry = _user_cache.get(user_id)
+    if entry and entry[0] > now:
+        _user_cache.move_to_end(user_id)
+        return dict(entry[1])
+
+    user = await get_users_collection().find_one({"user_id": user_id})
+    if user:
+        _user_cache[user_id] = (now + USER_CACHE_TTL, user)
+        _user_cache.move_to_end(user_id)
+        if len(_user_cache) > USER_CACHE_MAXSIZE:
+            _user_cache.popitem(last=False)
+        return dict(user)
+    _user_cache.pop(user_id, None)
+    return None
+
+
 def create_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
     to_encode["exp"] = expire
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return jwt.encode(to_encode, _JWT_KEY, algorithm=ALGORITHM)
+
+
+def _decode_token(token: str) -> dict:
+    payload = _token_cache.get(token)
+    if payload is not None:
+        if payload.get("exp", 0) > time.time():
+            _token_cache.move_to_end(token)
+            return payload
+        del _token_cache[token]
+
+    # Lève JWTError (dont ExpiredSignatureError) : rien n'est mis en cache dans ce cas
+    payload = jwt.decode(token, _JWT_KEY, algorithms=[ALGORITHM])
+    _token_cache[token] = payload
+    if len(_token_cache) > TOKEN_CACHE_MAXSIZE:
+        _token_cache.popitem(last=False)
+    return payload
 
 
 async def get_current_user(
@@ -42,14 +98,13 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     try:
-        payload = jwt.decode(token_value, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _decode_token(token_value)
         user_id: str = payload.get("sub")
         if not user_id:
             raise HTTPException(status_code=401, detail="Token invalide")
     except JWTError:
         raise HTTPException(status_code=401, detail="Token invalide ou expiré")
-    coll = get_users_collection()
-    user = await coll.find_one({"user_id": user_id})
+    user = await _load_user(user_id)
     if not user:
         raise HTTPException(status_code=401, detail="Utilisateur introuvable")
     return user
@@ -0,0 +1,6 @@
+from datetime import datetime, timezone
+
+
+def get_now() -> datetime:
+    """Horodatage UTC de la requête. Via Depends, FastAPI le calcule une seule fois par requête."""
+    return datetime.now(timezone.utc)
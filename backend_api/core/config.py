@@ -1,11 +1,29 @@
-import os
+from functools import lru_cache
+from typing import Optional
+
 from dotenv import load_dotenv
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 load_dotenv()  # charge .env
 
-class Settings:
-    MONGO_URL: str = os.getenv("MONGO_URL")
-    DATABASE_NAME: str = os.getenv("DATABASE_NAME")
-    ENV: str = os.getenv("ENV", "development")
 
-settings = Settings()
\ No newline at end of file
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(extra="ignore")
+
+    MONGO_URL: Optional[str] = None
+    DATABASE_NAME: Optional[str] = None
+    ENV: str = "development"
+    # Derrière nginx : préfixe "internal" vers lequel rediriger /uploads (ex. "/internal/uploads/")
+    UPLOADS_ACCEL_REDIRECT: str = ""
+    # Clé de signature JWT, obligatoire (.env ou variable d'environnement) : aucune valeur par défaut,
+    # une clé publiée permettrait de forger des jetons
+    SECRET_KEY: str = Field(min_length=32)
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
+
+
+settings = get_settings()
\ No newline at end of file
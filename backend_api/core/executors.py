@@ -0,0 +1,23 @@
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# Pools dédiés : bcrypt et les écritures disque ne se disputent plus l'executor par défaut.
+# Des threads suffisent : bcrypt et les appels fichiers relâchent le GIL.
+CPU_POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="cpu")
+IO_POOL = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 4) * 4), thread_name_prefix="io")
+
+
+async def run_cpu(func, *args):
+    """Exécute un calcul bloquant (bcrypt…) sur le pool CPU."""
+    return await asyncio.get_running_loop().run_in_executor(CPU_POOL, func, *args)
+
+
+async def run_io(func, *args):
+    """Exécute une opération fichier bloquante sur le pool I/O."""
+    return await asyncio.get_running_loop().run_in_executor(IO_POOL, func, *args)
+
+
+def shutdown_executors():
+    CPU_POOL.shutdown(wait=False, cancel_futures=True)
+    IO_POOL.shutdown(wait=True)
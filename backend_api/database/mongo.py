@@ -1,4 +1,4 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
 from backend_api.core.config import settings
 import logging
 
@@ -10,16 +10,30 @@ class MongoDB:
 
 mongodb = MongoDB()
 
+# Pool et compression réseau (zstd négocié avec MongoDB >= 4.2, zlib en repli)
+MONGO_CLIENT_OPTIONS = {
+    "maxPoolSize": 200,
+    "minPoolSize": 10,
+    "compressors": "zstd,zlib",
+    "zlibCompressionLevel": -1,
+    "retryWrites": True,
+    "serverSelectionTimeoutMS": 2000,
+    "socketTimeoutMS": 5000,
+    "waitQueueTimeoutMS": 1000,
+}
+
 
 # 🔌 Connexion au démarrage de FastAPI
 async def connect_to_mongo():
     try:
-        mongodb.client = AsyncIOMotorClient(settings.MONGO_URL)
+        mongodb.client = AsyncIOMotorClient(settings.MONGO_URL, **MONGO_CLIENT_OPTIONS)
         mongodb.db = mongodb.client[settings.DATABASE_NAME]
 
         # Ping pour vérifier connexion
         await mongodb.client.admin.command("ping")
 
+        await ensure_indexes()
+
         logger.info("✅ Connected to MongoDB")
 
     except Exception as e:
@@ -27,6 +41,22 @@ async def connect_to_mongo():
         raise e
 
 
+# 🗂️ Index (idempotent : create_index ne fait rien si l'index existe déjà)
+async def ensure_indexes():
+    db = mongodb.db
+    await db["listings"].create_index([("listing_id", 1)], unique=True)
+    # Tableau de bord vendeur : filtre seller_id, tri created_at décroissant
+    await db["listings"].create_index([("seller_id", 1), ("created_at", -1)])
+    # Catalogue acheteur : status = AUCTION_ACTIVE
+    await db["listings"].create_index([("status", 1)])
+    await db["bids"].create_index([("listing_id", 1), ("user_id", 1)])
+    await db["users"].create_index("email", unique=True)
+    await db["users"].create_index("user_id", unique=True)
+    # Déduplication des images par contenu
+    await db["images_meta"].create_index("sha1", unique=True)
+    logger.info("🗂️ MongoDB indexes ensured")
+
+
 # 🔌 Fermeture propre
 async def close_mongo_connection():
     if mongodb.client:
@@ -44,4 +74,15 @@ def get_users_collection():
 
 
 def get_bids_collection():
-    return mongodb.db["bids"]
\ No newline at end of file
+    return mongodb.db["bids"]
+
+
+def get_images_meta_collection():
+    return mongodb.db["images_meta"]
+
+
+GRIDFS_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+
+def get_gridfs_bucket(bucket_name: str = "images"):
+    return AsyncIOMotorGridFSBucket(mongodb.db, bucket_name=bucket_name, chunk_size_bytes=GRIDFS_CHUNK_SIZE)
\ No newline at end of file
@@ -1,13 +1,17 @@
 import os
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from backend_api.routers.upload_router import router as upload_router
 from backend_api.routers.auth_router import router as auth_router
 from backend_api.routers.listings_router import router as listings_router
 from backend_api.database.mongo import connect_to_mongo, close_mongo_connection
+from backend_api.core.responses import ORJSONResponse
+from backend_api.core.config import settings
+from backend_api.core.auth import dummy_verify_password
+from backend_api.core.executors import shutdown_executors
 
-app = FastAPI(title="Sealed Auction API")
+app = FastAPI(title="Sealed Auction API", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,15 +31,24 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup():
     await connect_to_mongo()
+    dummy_verify_password()
 
 @app.on_event("shutdown")
 async def shutdown():
     await close_mongo_connection()
+    shutdown_executors()
 
 app.include_router(auth_router, prefix="/api")
 app.include_router(upload_router, prefix="/api")
 app.include_router(listings_router, prefix="/api")
 
 UPLOADS_DIR = os.path.join(os.path.dirname(__file__), "..", "uploads")
-if os.path.isdir(UPLOADS_DIR):
+if settings.UPLOADS_ACCEL_REDIRECT:
+    # nginx sert le fichier lui-même (sendfile) ; Python ne fait que valider le nom
+    @app.get("/uploads/{filename}", include_in_schema=False)
+    async def serve_upload(filename: str):
+        if os.path.basename(filename) != filename or filename.startswith("."):
+            raise HTTPException(status_code=404)
+        return Response(headers={"X-Accel-Redirect": settings.UPLOADS_ACCEL_REDIRECT + filename})
+elif os.path.isdir(UPLOADS_DIR):
     app.mount("/uploads", StaticFiles(directory=UPLOADS_DIR), name="uploads")
\ No newline at end of file
@@ -6,8 +6,10 @@ from typing import Optional, Dict, List
 class ImageModel(BaseModel):
     filename: str
     original_name: str
-    local_path: str
+    local_path: str  # original intact (outils IA)
     mime_type: str
+    gridfs_file_id: Optional[str] = None
+    display_path: Optional[str] = None  # copie réduite servie par /uploads (filename)
 
 
 class BlockchainModel(BaseModel):
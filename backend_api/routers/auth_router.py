@@ -1,5 +1,5 @@
-import uuid
 from datetime import timedelta
+from bson import ObjectId
 
 from fastapi import APIRouter, HTTPException, Depends
 from backend_api.database.mongo import get_users_collection
@@ -7,10 +7,12 @@ from backend_api.models.user_models import UserCreate, UserLogin, UserResponse,
 from backend_api.core.auth import (
     hash_password,
     verify_password,
+    dummy_verify_password,
     create_token,
     get_current_user,
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
+from backend_api.core.executors import run_cpu
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -20,11 +22,11 @@ async def register(data: UserCreate):
     coll = get_users_collection()
     if await coll.find_one({"email": data.email}):
         raise HTTPException(status_code=400, detail="Cet email est déjà utilisé")
-    user_id = str(uuid.uuid4())
+    user_id = str(ObjectId())
     doc = {
         "user_id": user_id,
         "email": data.email,
-        "password_hash": hash_password(data.password),
+        "password_hash": await run_cpu(hash_password, data.password),
         "role": data.role,
         "name": data.name or "",
     }
@@ -45,7 +47,11 @@ async def register(data: UserCreate):
 async def login(data: UserLogin):
     coll = get_users_collection()
     user = await coll.find_one({"email": data.email})
-    if not user or not verify_password(data.password, user["password_hash"]):
+    # bcrypt (~300 ms CPU, GIL relâché) tourne sur le pool CPU : la boucle reste disponible
+    if not user:
+        await run_cpu(dummy_verify_password)
+        raise HTTPException(status_code=401, detail="Email ou mot de passe incorrect")
+    if not await run_cpu(verify_password, data.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Email ou mot de passe incorrect")
     token = create_token({"sub": user["user_id"]}, timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     return TokenResponse(
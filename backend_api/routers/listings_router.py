@@ -4,6 +4,7 @@ from backend_api.services.listing_service import (
     get_listing_by_id,
     get_listings_for_buyer,
     get_listings_by_seller,
+    BUYER_PROJECTION,
 )
 from backend_api.core.auth import get_current_user, require_seller, require_buyer
 
@@ -27,13 +28,8 @@ async def my_listings(user=Depends(require_seller)):
 @router.get("/{listing_id}")
 async def get_listing(listing_id: str, user=Depends(get_current_user)):
     """Détail d'un listing. Vue limitée pour acheteur (pas les offres)."""
-    listing = await get_listing_by_id(listing_id)
+    projection = BUYER_PROJECTION if user["role"] == "buyer" else None
+    listing = await get_listing_by_id(listing_id, projection)
     if not listing:
         raise HTTPException(status_code=404, detail="Listing introuvable")
-    if user["role"] == "buyer":
-        listing.pop("price_estimation", None)
-        listing.pop("ai_analysis", None)
-        listing.pop("seller_id", None)
-        listing.pop("generated_post", None)
-        listing.pop("blockchain", None)
     return listing
@@ -1,14 +1,23 @@
 import os
-import uuid
 import shutil
+import asyncio
+import hashlib
 
 from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Body
+from fastapi.responses import StreamingResponse
+from PIL import Image, ImageOps, UnidentifiedImageError
 
-from backend_api.database.mongo import get_listings_collection
-from backend_api.services.listing_service import build_listing_document, get_listing_by_id
+from backend_api.database.mongo import get_listings_collection, get_bids_collection, get_images_meta_collection
+from backend_api.services.listing_service import build_listing_document, get_listing_by_id, BUYER_PROJECTION
+from backend_api.services.file_service import store_file_gridfs, open_gridfs_file, delete_gridfs_files
 from backend_api.models.listing_models import ListingResponse
 from backend_api.core.auth import require_seller, require_buyer, get_current_user
+from backend_api.core.clock import get_now
+from backend_api.core.executors import run_cpu, run_io
 
 
 router = APIRouter()
@@ -16,6 +25,93 @@ router = APIRouter()
 UPLOAD_FOLDER = "uploads"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Copie servie par /uploads : bord max 1024 px, JPEG q85 ; l'original est archivé dans GridFS
+DISPLAY_MAX_SIDE = 1024
+DISPLAY_JPEG_QUALITY = 85
+# Fichiers d'une même requête traités en parallèle (disque + GridFS)
+UPLOAD_CONCURRENCY = 8
+HASH_CHUNK_SIZE = 1 << 20  # 1 MiB
+COPY_BUFFER_SIZE = 1 << 20  # 1 MiB
+
+
+def _sha1_upload(src) -> str:
+    h = hashlib.sha1()
+    while chunk := src.read(HASH_CHUNK_SIZE):
+        h.update(chunk)
+    src.seek(0)
+    return h.hexdigest()
+
+
+def _save_display_copy(src, file_path: str) -> None:
+    with Image.open(src) as img:
+        # JPEG : décodage directement à l'échelle réduite (DCT), bien moins de pixels à traiter
+        img.draft("RGB", (DISPLAY_MAX_SIDE, DISPLAY_MAX_SIDE))
+        img = ImageOps.exif_transpose(img).convert("RGB")
+        img.thumbnail((DISPLAY_MAX_SIDE, DISPLAY_MAX_SIDE), Image.Resampling.LANCZOS)
+        img.save(file_path, format="JPEG", quality=DISPLAY_JPEG_QUALITY)
+
+
+def _copy_upload(src, file_path: str) -> None:
+    with open(file_path, "wb") as out:
+        shutil.copyfileobj(src, out, COPY_BUFFER_SIZE)
+
+
+async def _store_upload(
+    file: UploadFile, original_name: str, display_name: str, listing_id: str, sem: asyncio.Semaphore
+) -> dict:
+    async with sem:
+        # Contenu déjà connu (renvoi, photo identique) : fichiers et archive existants réutilisés
+        sha1 = await run_io(_sha1_upload, file.file)
+        meta_coll = get_images_meta_collection()
+        known = await meta_coll.find_one(
+            {"sha1": sha1}, {"_id": 0, "filename": 1, "local_path": 1, "gridfs_file_id": 1}
+        )
+        if known:
+            return {**known, "reused": True}
+
+        # Original intact sur disque : les outils IA (EXIF, ELA, recherche inversée) le lisent
+        local_path = os.path.join(UPLOAD_FOLDER, original_name)
+        await run_io(_copy_upload, file.file, local_path)
+        file.file.seek(0)
+        # Copie réduite servie par /uploads (décodage/redimensionnement hors boucle)
+        display_path = os.path.join(UPLOAD_FOLDER, display_name)
+        try:
+            await run_cpu(_save_display_copy, file.file, display_path)
+            filename = display_name
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+            # Format non lu par Pillow (SVG, HEIC…), image démesurée ou tronquée : original servi tel quel
+            await run_io(_remove_files, [display_path])
+            filename = original_name
+        file.file.seek(0)
+        file_id = await store_file_gridfs(
+            file.file, original_name, listing_id, "images", content_type=file.content_type
+        )
+        stored = {"filename": filename, "local_path": local_path, "gridfs_file_id": file_id}
+        try:
+            await meta_coll.insert_one({"sha1": sha1, **stored})
+        except DuplicateKeyError:
+            # Même contenu enregistré en parallèle : ces fichiers restent propres à l'annonce
+            pass
+        return {**stored, "reused": False}
+
+
+def _remove_files(paths) -> None:
+    # Nettoyage bloquant : appelé via run_io depuis les handlers
+    for p in paths:
+        try:
+            os.remove(p)
+        except FileNotFoundError:
+            pass
+
+
+async def _discard_uploads(paths, results) -> None:
+    # Uniquement ce que la requête a créé : les fichiers réutilisés appartiennent à d'autres annonces
+    await run_io(_remove_files, paths)
+    own_ids = [r["gridfs_file_id"] for r in results if isinstance(r, dict) and not r["reused"]]
+    if own_ids:
+        await get_images_meta_collection().delete_many({"gridfs_file_id": {"$in": own_ids}})
+        await delete_gridfs_files(own_ids, "images")
+
 
 # --------------------------------------------------
 # 📌 POST - Upload Images (1 ou plusieurs)
@@ -27,59 +123,86 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 async def upload_images(
     files: list[UploadFile] = File(...),
     user=Depends(require_seller),
+    now: datetime = Depends(get_now),
 ):
     if not files:
         raise HTTPException(status_code=400, detail="Au moins une image requise")
 
-    listing_id = str(uuid.uuid4())
+    # ObjectId : croissant dans le temps, les insertions restent en fin d'index
+    listing_id = str(ObjectId())
     images_data = []
-    saved_paths = []
+    original_names = []
+    display_names = []
 
     for i, file in enumerate(files):
         if not file.content_type or not file.content_type.startswith("image/"):
-            for p in saved_paths:
-                if os.path.exists(p):
-                    os.remove(p)
             raise HTTPException(status_code=400, detail=f"Fichier invalide : {file.filename} doit être une image")
 
         ext = file.filename.split(".")[-1].lower() if "." in file.filename else "jpg"
-        new_filename = f"{listing_id}-{i}.{ext}"
-        file_path = os.path.join(UPLOAD_FOLDER, new_filename)
-
-        try:
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-        except Exception:
-            for p in saved_paths:
-                if os.path.exists(p):
-                    os.remove(p)
-            raise HTTPException(status_code=500, detail="Échec sauvegarde fichier")
-
-        saved_paths.append(file_path)
+        # Original sous son extension ; copie affichée toujours en JPEG
+        original_names.append(f"{listing_id}-{i}.{ext}")
+        display_names.append(f"{listing_id}-{i}-display.jpg")
         images_data.append({
-            "filename": new_filename,
             "original_name": file.filename,
-            "local_path": file_path,
             "mime_type": file.content_type,
         })
 
+    written_paths = [os.path.join(UPLOAD_FOLDER, name) for name in original_names + display_names]
+
+    # Écritures en parallèle (au plus UPLOAD_CONCURRENCY à la fois), puis un seul insert pour l'annonce
+    sem = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+    results = await asyncio.gather(
+        *(
+            _store_upload(file, original, display, listing_id, sem)
+            for file, original, display in zip(files, original_names, display_names)
+        ),
+        return_exceptions=True,
+    )
+    if any(isinstance(r, Exception) for r in results):
+        await _discard_uploads(written_paths, results)
+        raise HTTPException(status_code=500, detail="Échec sauvegarde fichier")
+    for img, stored in zip(images_data, results):
+        img["filename"] = stored["filename"]
+        img["local_path"] = stored.get("local_path") or os.path.join(UPLOAD_FOLDER, stored["filename"])
+        img["display_path"] = os.path.join(UPLOAD_FOLDER, stored["filename"])
+        img["gridfs_file_id"] = stored["gridfs_file_id"]
+
     document = build_listing_document(
         listing_id=listing_id,
         images_data=images_data,
         seller_id=user["user_id"],
+        now=now,
     )
 
     try:
         await get_listings_collection().insert_one(document)
     except Exception:
-        for p in saved_paths:
-            if os.path.exists(p):
-                os.remove(p)
+        await _discard_uploads(written_paths, results)
         raise HTTPException(status_code=500, detail="Échec insertion base de données")
 
     return {"listing_id": listing_id, "message": "Annonce créée avec succès"}
 
 
+# --------------------------------------------------
+# 📌 GET - Image stockée dans GridFS (flux par chunks de 1 MiB)
+# --------------------------------------------------
+@router.get("/image/{file_id}", summary="Image produit depuis GridFS")
+async def get_image(file_id: str):
+    found = await open_gridfs_file(file_id, "images")
+    if not found:
+        raise HTTPException(status_code=404, detail="Image introuvable")
+    chunks, content_type, length = found
+    # Un fichier GridFS ne change jamais pour un id donné : le navigateur peut le garder
+    return StreamingResponse(
+        chunks,
+        media_type=content_type or "application/octet-stream",
+        headers={
+            "Content-Length": str(length),
+            "Cache-Control": "public, max-age=31536000, immutable",
+        },
+    )
+
+
 # --------------------------------------------------
 # 📌 GET - Retrieve Listing by ID
 # --------------------------------------------------
@@ -91,16 +214,11 @@ async def fetch_listing(
     listing_id: str,
     user=Depends(get_current_user),
 ):
-    listing = await get_listing_by_id(listing_id)
+    # Acheteur : ni le pipeline ni les données vendeur/IA (projection Mongo)
+    projection = BUYER_PROJECTION if user["role"] == "buyer" else None
+    listing = await get_listing_by_id(listing_id, projection)
     if not listing:
         raise HTTPException(status_code=404, detail="Listing not found")
-    if user["role"] == "buyer":
-        listing.pop("price_estimation", None)
-        listing.pop("ai_analysis", None)
-        listing.pop("seller_id", None)
-        listing.pop("generated_post", None)
-        listing.pop("blockchain", None)
-        listing.pop("pipeline_phase", None)  # Acheteur ne voit pas le pipeline
     return listing
 
 
@@ -109,77 +227,87 @@ async def fetch_listing(
 @router.post("/listing/{listing_id}/analyze")
 async def run_authenticity(listing_id: str, user=Depends(require_seller)):
     coll = get_listings_collection()
-    listing = await coll.find_one({"listing_id": listing_id, "seller_id": user["user_id"]})
+    listing = await coll.find_one_and_update(
+        {"listing_id": listing_id, "seller_id": user["user_id"]},
+        {
+            "$set": {
+                "pipeline_phase": 2,
+                "status": "AUTHENTICATED",
+                "ai_analysis": {"score": 87, "verdict": "Authentique", "details": "Analyse IA simulée"},
+            },
+            # Horloge du serveur Mongo, écrite avec le reste dans la même mise à jour
+            "$currentDate": {"updated_at": True},
+        },
+        projection={"_id": 1},
+    )
     if not listing:
         raise HTTPException(404, "Listing introuvable")
-    await coll.update_one(
-        {"listing_id": listing_id},
-        {"$set": {
-            "pipeline_phase": 2,
-            "status": "AUTHENTICATED",
-            "ai_analysis": {"score": 87, "verdict": "Authentique", "details": "Analyse IA simulée"},
-            "updated_at": datetime.utcnow(),
-        }}
-    )
     return {"message": "Vérification authenticité terminée", "phase": 2}
 
 
 @router.post("/listing/{listing_id}/estimate")
 async def run_pricing(listing_id: str, user=Depends(require_seller)):
     coll = get_listings_collection()
-    listing = await coll.find_one({"listing_id": listing_id, "seller_id": user["user_id"]})
+    listing = await coll.find_one_and_update(
+        {"listing_id": listing_id, "seller_id": user["user_id"]},
+        {
+            "$set": {
+                "pipeline_phase": 3,
+                "status": "PRICED",
+                "starting_price": 150.0,
+                "price_estimation": {"low": 100, "median": 150, "high": 200},
+            },
+            "$currentDate": {"updated_at": True},
+        },
+        projection={"_id": 1},
+    )
     if not listing:
         raise HTTPException(404, "Listing introuvable")
-    await coll.update_one(
-        {"listing_id": listing_id},
-        {"$set": {
-            "pipeline_phase": 3,
-            "status": "PRICED",
-            "starting_price": 150.0,
-            "price_estimation": {"low": 100, "median": 150, "high": 200},
-            "updated_at": datetime.utcnow(),
-        }}
-    )
     return {"message": "Estimation prix terminée", "phase": 3, "starting_price": 150}
 
 
 @router.post("/listing/{listing_id}/generate")
 async def run_post_gen(listing_id: str, user=Depends(require_seller)):
     coll = get_listings_collection()
-    listing = await coll.find_one({"listing_id": listing_id, "seller_id": user["user_id"]})
+    listing = await coll.find_one_and_update(
+        {"listing_id": listing_id, "seller_id": user["user_id"]},
+        {
+            "$set": {
+                "pipeline_phase": 4,
+                "status": "POSTED",
+                "title": "Objet d'art - Titre généré par IA",
+                "generated_post": {"title": "...", "description": "..."},
+            },
+            "$currentDate": {"updated_at": True},
+        },
+        projection={"_id": 1},
+    )
     if not listing:
         raise HTTPException(404, "Listing introuvable")
-    await coll.update_one(
-        {"listing_id": listing_id},
-        {"$set": {
-            "pipeline_phase": 4,
-            "status": "POSTED",
-            "title": "Objet d'art - Titre généré par IA",
-            "generated_post": {"title": "...", "description": "..."},
-            "updated_at": datetime.utcnow(),
-        }}
-    )
     return {"message": "Post généré", "phase": 4}
 
 
 @router.post("/listing/{listing_id}/deploy")
-async def deploy_auction(listing_id: str, user=Depends(require_seller)):
+async def deploy_auction(listing_id: str, user=Depends(require_seller), now: datetime = Depends(get_now)):
     coll = get_listings_collection()
-    listing = await coll.find_one({"listing_id": listing_id, "seller_id": user["user_id"]})
+    end_time = now + timedelta(days=7)
+    listing = await coll.find_one_and_update(
+        {"listing_id": listing_id, "seller_id": user["user_id"]},
+        {
+            "$set": {
+                "pipeline_phase": 5,
+                "status": "AUCTION_ACTIVE",
+                "participants_count": 0,
+                "participant_ids": [],
+                "end_time": end_time,
+                "blockchain": {"auction_address": f"0x{listing_id[:40]}", "tx_hash": "0x..."},
+            },
+            "$currentDate": {"updated_at": True},
+        },
+        projection={"_id": 1},
+    )
     if not listing:
         raise HTTPException(404, "Listing introuvable")
-    end_time = datetime.utcnow() + timedelta(days=7)
-    await coll.update_one(
-        {"listing_id": listing_id},
-        {"$set": {
-            "pipeline_phase": 5,
-            "status": "AUCTION_ACTIVE",
-            "participants_count": 0,
-            "end_time": end_time,
-            "blockchain": {"auction_address": f"0x{listing_id[:40]}", "tx_hash": "0x..."},
-            "updated_at": datetime.utcnow(),
-        }}
-    )
     return {"message": "Enchère lancée", "phase": 5, "end_time": end_time.isoformat()}
 
 
@@ -190,29 +318,47 @@ async def place_bid(
     listing_id: str,
     body: dict = Body(...),
     user=Depends(require_buyer),
+    now: datetime = Depends(get_now),
 ):
-    from backend_api.database.mongo import get_bids_collection
     amount = body.get("amount")
     if amount is None or not isinstance(amount, (int, float)) or amount <= 0:
         raise HTTPException(400, "Montant invalide")
     amount = float(amount)
     coll_listings = get_listings_collection()
-    listing = await coll_listings.find_one({"listing_id": listing_id, "status": "AUCTION_ACTIVE"})
+    bids = get_bids_collection()
+    # participant_ids en $slice 0 : seule sa présence compte (absent sur les enchères antérieures)
+    listing = await coll_listings.find_one(
+        {"listing_id": listing_id, "status": "AUCTION_ACTIVE"},
+        {"_id": 0, "starting_price": 1, "participant_ids": {"$slice": 0}},
+    )
     if not listing:
         raise HTTPException(404, "Enchère introuvable ou terminée")
     min_price = listing.get("starting_price") or 0
     if amount < min_price:
         raise HTTPException(400, f"Le montant doit être au moins {min_price} €")
-    bids_coll = get_bids_collection()
-    await bids_coll.insert_one({
+
+    # L'offre d'abord : l'annonce ne compte un participant qu'une fois son offre enregistrée
+    await bids.insert_one({
         "listing_id": listing_id,
         "user_id": user["user_id"],
         "amount": amount,
-        "created_at": datetime.utcnow(),
+        "created_at": now,
     })
-    distinct_bidders = await bids_coll.distinct("user_id", {"listing_id": listing_id})
-    await coll_listings.update_one(
+
+    if "participant_ids" in listing:
+        new_ids = [user["user_id"]]
+    else:
+        # Enchère antérieure à participant_ids : reconstitué une fois depuis les offres (dont celle-ci)
+        new_ids = await bids.distinct("user_id", {"listing_id": listing_id})
+    # Ajout idempotent à l'ensemble, participants_count recalculé à partir de lui
+    updated = await coll_listings.find_one_and_update(
         {"listing_id": listing_id},
-        {"$set": {"participants_count": len(distinct_bidders), "updated_at": datetime.utcnow()}}
+        [
+            {"$set": {"participant_ids": {"$setUnion": [{"$ifNull": ["$participant_ids", []]}, new_ids]}}},
+            # Pipeline d'agrégation : $$NOW tient lieu de $currentDate (horloge du serveur)
+            {"$set": {"participants_count": {"$size": "$participant_ids"}, "updated_at": "$$NOW"}},
+        ],
+        projection={"_id": 0, "participants_count": 1},
+        return_document=ReturnDocument.AFTER,
     )
-    return {"message": "Offre enregistrée (scellée)", "participants": len(distinct_bidders)}
\ No newline at end of file
+    return {"message": "Offre enregistrée (scellée)", "participants": updated["participants_count"]}
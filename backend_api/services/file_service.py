@@ -0,0 +1,41 @@
+from typing import AsyncIterator, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from gridfs.errors import NoFile
+
+from backend_api.database.mongo import get_gridfs_bucket
+
+
+async def store_file_gridfs(content, filename: str, session_id: str, kind: str, content_type: Optional[str] = None) -> str:
+    """Stocke un fichier (bytes ou objet fichier lu par blocs) dans le bucket GridFS `kind`."""
+    bucket = get_gridfs_bucket(kind)
+    metadata = {"session_id": session_id}
+    if content_type:
+        metadata["content_type"] = content_type
+    file_id = await bucket.upload_from_stream(filename, content, metadata=metadata)
+    return str(file_id)
+
+
+async def delete_gridfs_files(file_ids, kind: str) -> None:
+    bucket = get_gridfs_bucket(kind)
+    for file_id in file_ids:
+        try:
+            await bucket.delete(ObjectId(file_id))
+        except NoFile:
+            pass
+
+
+async def open_gridfs_file(file_id: str, kind: str) -> Optional[Tuple[AsyncIterator[bytes], Optional[str], int]]:
+    """Flux des chunks (1 MiB) d'un fichier GridFS, son type MIME et sa taille, ou None s'il n'existe pas."""
+    try:
+        grid_out = await get_gridfs_bucket(kind).open_download_stream(ObjectId(file_id))
+    except (InvalidId, NoFile):
+        return None
+
+    async def chunks():
+        while chunk := await grid_out.readchunk():
+            yield chunk
+
+    content_type = (grid_out.metadata or {}).get("content_type")
+    return chunks(), content_type, grid_out.length
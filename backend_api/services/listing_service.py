@@ -1,38 +1,75 @@
 from datetime import datetime
-from typing import List, Dict, Any
-from backend_api.models.listing_models import ListingCreate, ImageModel, BlockchainModel
+from typing import List, Dict, Any, Optional
 from backend_api.database.mongo import get_listings_collection
 
+# Champs jamais renvoyés à un acheteur : exclus côté Mongo, pas après coup en Python
+BUYER_PROJECTION = {
+    "_id": 0,
+    "price_estimation": 0,
+    "ai_analysis": 0,
+    "seller_id": 0,
+    "generated_post": 0,
+    "blockchain": 0,
+    "pipeline_phase": 0,
+    "participant_ids": 0,  # enchère scellée : les autres enchérisseurs restent invisibles
+}
+
+# Catalogue acheteur : seule la première image sert de miniature, Mongo coupe le tableau
+BUYER_LIST_PROJECTION = {**BUYER_PROJECTION, "images": {"$slice": 1}}
+
+# Liste vendeur (tableau de bord) : ni les gros sous-documents IA/blockchain ni les enchérisseurs,
+# une seule image (miniature) ; le détail complet passe par get_listing_by_id
+SELLER_LIST_PROJECTION = {
+    "_id": 0,
+    "ai_analysis": 0,
+    "price_estimation": 0,
+    "generated_post": 0,
+    "blockchain": 0,
+    "participant_ids": 0,
+    "images": {"$slice": 1},
+}
+
 
 def build_listing_document(
     listing_id: str,
     images_data: List[Dict[str, str]],
     seller_id: str,
+    now: datetime,
 ):
-    images = [
-        ImageModel(
-            filename=img["filename"],
-            original_name=img["original_name"],
-            local_path=img["local_path"],
-            mime_type=img["mime_type"],
-        )
-        for img in images_data
-    ]
-    blockchain = BlockchainModel()
-    listing = ListingCreate(
-        listing_id=listing_id,
-        seller_id=seller_id,
-        images=images,
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow(),
-        blockchain=blockchain
-    )
-    return listing.dict()
+    # Dict construit directement (mêmes champs que ListingCreate) : les données viennent
+    # du routeur, déjà validées, inutile de repasser par Pydantic pour un insert
+    return {
+        "listing_id": listing_id,
+        "seller_id": seller_id,
+        "images": [
+            {
+                "filename": img["filename"],
+                "original_name": img["original_name"],
+                "local_path": img["local_path"],
+                "display_path": img.get("display_path"),
+                "mime_type": img["mime_type"],
+                "gridfs_file_id": img.get("gridfs_file_id"),
+            }
+            for img in images_data
+        ],
+        "status": "UPLOADED",
+        "pipeline_phase": 1,
+        "created_at": now,
+        "updated_at": now,
+        "title": None,
+        "starting_price": None,
+        "participants_count": 0,
+        "end_time": None,
+        "ai_analysis": None,
+        "price_estimation": None,
+        "generated_post": None,
+        "blockchain": {"auction_address": None, "tx_hash": None},
+    }
 
 
-async def get_listing_by_id(listing_id: str) -> Any:
+async def get_listing_by_id(listing_id: str, projection: Optional[Dict[str, int]] = None) -> Any:
     collection = get_listings_collection()
-    listing = await collection.find_one({"listing_id": listing_id})
+    listing = await collection.find_one({"listing_id": listing_id}, projection)
     if listing:
         listing.pop("_id", None)
         # Rétrocompatibilité : image (singulier) -> images
@@ -48,27 +85,19 @@ def _normalize_listing_images(doc: dict) -> None:
 
 async def get_listings_for_buyer():
     coll = get_listings_collection()
-    cursor = coll.find({"status": "AUCTION_ACTIVE"})
+    cursor = coll.find({"status": "AUCTION_ACTIVE"}, BUYER_LIST_PROJECTION)
     items = []
     async for doc in cursor:
-        doc.pop("_id", None)
         _normalize_listing_images(doc)
-        doc.pop("price_estimation", None)
-        doc.pop("ai_analysis", None)
-        doc.pop("seller_id", None)
-        doc.pop("generated_post", None)
-        doc.pop("blockchain", None)
-        doc.pop("pipeline_phase", None)
         items.append(doc)
     return items
 
 
 async def get_listings_by_seller(seller_id: str):
     coll = get_listings_collection()
-    cursor = coll.find({"seller_id": seller_id}).sort("created_at", -1)
+    cursor = coll.find({"seller_id": seller_id}, SELLER_LIST_PROJECTION).sort("created_at", -1)
     items = []
     async for doc in cursor:
-        doc.pop("_id", None)
         _normalize_listing_images(doc)
         items.append(doc)
     return items